@@ -0,0 +1,79 @@
+"""Cold-start regression check for energy_dashboard.py.
+
+    python benchmarks/check_cold_start.py [--budget-ms 150]
+
+Runs the dashboard's top-level import block in a fresh interpreter under
+``python -X importtime`` and fails (exit 1) if it takes longer than the budget
+on top of importing streamlit itself, or if any heavy module is executed
+eagerly instead of on first use.
+"""
+import argparse
+import ast
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "energy_dashboard.py"
+
+# Modules the dashboard should only load lazily
+HEAVY_MODULES = ["pandas", "numpy", "plotly.express", "requests"]
+
+
+def import_block(path):
+    """Source of the module-level import statements in path"""
+    source = path.read_text()
+    tree = ast.parse(source)
+    return "\n".join(
+        ast.get_source_segment(source, node)
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def import_time_us(code):
+    """Total self import time in microseconds reported by -X importtime for code"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    total = 0
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            self_us = line.split(":", 1)[1].split("|")[0].strip()
+            if self_us.isdigit():
+                total += int(self_us)
+    return total, result.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=150, help="allowed import time on top of streamlit")
+    parser.add_argument("--runs", type=int, default=3, help="take the fastest of this many runs")
+    args = parser.parse_args()
+
+    block = import_block(APP)
+    probe = block + "\nimport sys\nprint(','.join(m for m in %r if m in sys.modules))" % (HEAVY_MODULES,)
+
+    baseline = min(import_time_us("import streamlit")[0] for _ in range(args.runs))
+    app_runs = [import_time_us(probe) for _ in range(args.runs)]
+    app_time = min(t for t, _ in app_runs)
+    eager = [m for m in app_runs[0][1].strip().split(",") if m]
+
+    extra_ms = (app_time - baseline) / 1000
+    print(f"streamlit: {baseline / 1000:.1f} ms, dashboard imports: {app_time / 1000:.1f} ms ({extra_ms:+.1f} ms)")
+
+    failed = False
+    if eager:
+        print(f"FAIL: imported eagerly at startup: {', '.join(eager)}")
+        failed = True
+    if extra_ms > args.budget_ms:
+        print(f"FAIL: +{extra_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Load test: N concurrent browser sessions against a real Streamlit server and the local API stub.
+
+    python benchmarks/load_test.py --sessions 50 --reruns 10 --latency 0.3 --rate-limit-rate 0.1
+
+Starts the API stub, then ``streamlit run energy_dashboard.py`` in a child
+process pointed at it, and opens one websocket per session speaking the same
+protocol as the browser. Every session asks for its reruns at the same time,
+so the server runs them concurrently, as it would for real viewers. A rerun's
+latency is the time from the rerun request to the server's script_finished
+message. Reports upstream calls seen by the stub, rerun latency percentiles
+and the share of reruns that fell back to estimated data.
+"""
+import argparse
+import asyncio
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from stub_server import StubServer, add_config_arguments, config_from_args
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_streamlit(secrets_path, port, log_path, timeout=60):
+    """Run the dashboard under `streamlit run` and wait until it answers its health check"""
+    # Log to a file: an unread pipe fills up and blocks the server mid-rerun
+    log = open(log_path, "w")
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "streamlit", "run", str(ROOT / "energy_dashboard.py"),
+            "--server.headless", "true",
+            "--server.port", str(port),
+            "--server.address", "127.0.0.1",
+            "--browser.gatherUsageStats", "false",
+            "--secrets.files", str(secrets_path),
+        ],
+        cwd=ROOT, stdout=log, stderr=subprocess.STDOUT
+    )
+    log.close()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"streamlit exited with {process.returncode}:\n{Path(log_path).read_text()}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"streamlit did not become healthy within {timeout}s")
+
+
+async def rerun(ws, timeout):
+    """Ask for a full rerun; returns (seconds until script_finished, Data Source metric value)"""
+    from streamlit.proto.BackMsg_pb2 import BackMsg
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+    request = BackMsg()
+    request.rerun_script.query_string = ""
+    start = time.perf_counter()
+    await ws.send(request.SerializeToString())
+
+    source = None
+    while True:
+        message = ForwardMsg()
+        message.ParseFromString(await asyncio.wait_for(ws.recv(), timeout))
+        kind = message.WhichOneof("type")
+        if kind == "delta" and message.delta.WhichOneof("type") == "new_element":
+            element = message.delta.new_element
+            if element.WhichOneof("type") == "metric" and element.metric.label == "Data Source":
+                source = element.metric.body
+        elif kind == "script_finished":
+            return time.perf_counter() - start, source
+
+
+async def run_session(url, reruns, think_time, start_barrier, timeout):
+    """One simulated viewer: a cold load followed by reruns; returns (latencies, fallbacks)"""
+    import websockets
+
+    latencies, fallbacks = [], 0
+    async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+        await start_barrier.wait()
+        for _ in range(reruns + 1):
+            seconds, source = await rerun(ws, timeout)
+            latencies.append(seconds)
+            if source != "Live Data":
+                fallbacks += 1
+            await asyncio.sleep(think_time)
+    return latencies, fallbacks
+
+
+async def run_sessions(url, sessions, reruns, think_time, timeout):
+    barrier = asyncio.Barrier(sessions)
+    return await asyncio.gather(*(
+        run_session(url, reruns, think_time, barrier, timeout) for _ in range(sessions)
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--reruns", type=int, default=5, help="reruns per session after the first load")
+    parser.add_argument("--think-time", type=float, default=0.0, help="seconds between a session's reruns")
+    parser.add_argument("--ttl", type=int, default=300, help="POWER_CACHE_TTL passed to the app")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for one rerun")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = StubServer(config_from_args(args)).start()
+    with tempfile.TemporaryDirectory() as tmp:
+        secrets_path = Path(tmp) / "secrets.toml"
+        secrets_path.write_text(
+            f'API_KEY = "load-test"\n'
+            f'ELECTRICITY_MAPS_URL = "{server.base_url}"\n'
+            f'POWER_CACHE_TTL = {args.ttl}\n'
+            f'SNAPSHOT_DB = "{Path(tmp) / "snapshots.db"}"\n'
+        )
+        port = free_port()
+        app = start_streamlit(secrets_path, port, Path(tmp) / "streamlit.log")
+        try:
+            started = time.perf_counter()
+            results = asyncio.run(run_sessions(
+                f"ws://127.0.0.1:{port}/_stcore/stream", args.sessions, args.reruns, args.think_time, args.timeout
+            ))
+            elapsed = time.perf_counter() - started
+        finally:
+            app.terminate()
+            app.wait(timeout=30)
+
+    server.stop()
+
+    latencies = [t for session_latencies, _ in results for t in session_latencies]
+    fallbacks = sum(f for _, f in results)
+    stats = server.stats()
+
+    print(f"sessions: {args.sessions}, reruns: {len(latencies)} in {elapsed:.1f}s")
+    print(f"upstream calls: {sum(stats['calls'].values())} {stats['calls']}")
+    print(f"upstream statuses: {stats['statuses']}")
+    print(
+        "rerun latency: "
+        f"p50 {percentile(latencies, 50) * 1000:.0f} ms, "
+        f"p90 {percentile(latencies, 90) * 1000:.0f} ms, "
+        f"p99 {percentile(latencies, 99) * 1000:.0f} ms, "
+        f"mean {statistics.mean(latencies) * 1000:.0f} ms"
+    )
+    print(f"fallback rate: {fallbacks / len(latencies):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Benchmarks for the dashboard's hot paths.
+
+    python benchmarks/run_benchmarks.py                 # run and save results for HEAD
+    python benchmarks/run_benchmarks.py --compare abc123  # also compare against a saved commit
+
+Results are written to benchmarks/results/<commit>.json.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd
+
+from derived_metrics import growth_frame
+from figures import comparison_figure, mix_pie, mix_table, timeline_figures
+from owid_data import OWID_CSV, CountrySummary, open_mapped
+from power_data import process_kenya_data, sample_payloads
+from stub_server import StubServer
+
+LIVE_PAYLOAD = sample_payloads(1)[0]
+
+
+def app_rerun_benchmark(reruns):
+    """Seconds per headless rerun of energy_dashboard.py against a local API stub"""
+    from streamlit.testing.v1 import AppTest
+
+    server = StubServer().start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        at = AppTest.from_file(str(ROOT / "energy_dashboard.py"), default_timeout=60)
+        at.secrets["API_KEY"] = "benchmark"
+        at.secrets["ELECTRICITY_MAPS_URL"] = server.base_url
+        at.secrets["SNAPSHOT_DB"] = str(Path(tmp) / "snapshots.db")
+
+        at.run()  # cold run fills the caches
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+        timings = []
+        for _ in range(reruns):
+            start = time.perf_counter()
+            at.run()
+            timings.append(time.perf_counter() - start)
+
+    server.stop()
+    return timings
+
+
+def benchmarks():
+    live_df = process_kenya_data(LIVE_PAYLOAD, True)[0]
+    fallback_df = process_kenya_data()[0]
+    summary = CountrySummary.load()
+    kenya = summary.series("Kenya", (2000, summary.last_year))
+    owid_table = open_mapped().frame(["electricity_generation"])
+
+    return {
+        "process_live": (lambda: process_kenya_data(LIVE_PAYLOAD, True), 200),
+        "process_fallback": (lambda: process_kenya_data(), 200),
+        "mix_table": (lambda: mix_table(live_df), 200),
+        "mix_pie": (lambda: mix_pie(fallback_df, "Estimated Data"), 20),
+        "timeline_figures": (
+            lambda: timeline_figures("Kenya", kenya["year"], kenya["renewables_share_elec"], kenya["electricity_generation"]),
+            20
+        ),
+        "country_summary": (lambda: summary.series("Kenya", (2000, summary.last_year)), 2000),
+        "comparison_figure": (lambda: comparison_figure(("Kenya", "Global Average"), (92, 29)), 20),
+        "owid_read_csv": (lambda: pd.read_csv(OWID_CSV), 3),
+        "owid_open_mapped": (lambda: open_mapped().frame(), 20),
+        "growth_frame": (lambda: growth_frame(owid_table, "electricity_generation"), 20),
+    }
+
+
+def run(repeat, reruns):
+    results = {}
+    for name, (func, number) in benchmarks().items():
+        func()  # warm up imports and caches
+        timings = [t / number for t in timeit.repeat(func, number=number, repeat=repeat)]
+        results[name] = summarize(timings)
+        print(f"{name:20s} {results[name]['median'] * 1000:10.3f} ms")
+
+    results["app_rerun"] = summarize(app_rerun_benchmark(reruns))
+    print(f"{'app_rerun':20s} {results['app_rerun']['median'] * 1000:10.3f} ms")
+    return results
+
+
+def summarize(timings):
+    return {"min": min(timings), "median": statistics.median(timings), "runs": len(timings)}
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline_commit):
+    baseline = json.loads((RESULTS_DIR / f"{baseline_commit}.json").read_text())["results"]
+    print(f"\n{'benchmark':20s} {'baseline':>10s} {'current':>10s} {'change':>8s}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["median"], result["median"]
+        print(f"{name:20s} {before * 1000:8.2f}ms {after * 1000:8.2f}ms {(after / before - 1) * 100:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="timing repeats per benchmark")
+    parser.add_argument("--reruns", type=int, default=20, help="headless app reruns to time")
+    parser.add_argument("--compare", metavar="COMMIT", help="saved commit to compare against")
+    args = parser.parse_args()
+
+    commit = current_commit()
+    results = run(args.repeat, args.reruns)
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    (RESULTS_DIR / f"{commit}.json").write_text(json.dumps(
+        {"commit": commit, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results},
+        indent=2
+    ))
+    print(f"\nSaved benchmarks/results/{commit}.json")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
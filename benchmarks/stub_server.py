@@ -0,0 +1,215 @@
+"""Local stand-in for the Electricity Maps v3 API.
+
+    python benchmarks/stub_server.py --port 8800 --latency 0.2 --error-rate 0.05 --rate-limit-rate 0.1
+
+Then point the dashboard at it with ELECTRICITY_MAPS_URL = "http://127.0.0.1:8800/v3"
+in .streamlit/secrets.toml. Serves power-breakdown/latest, /history (last 24
+hours) and /past-range (hourly points between start and end).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Typical MW ranges per source; the stub draws values inside these
+SOURCE_RANGES = {
+    "hydro": (500, 900),
+    "geothermal": (700, 950),
+    "oil": (0, 300),
+    "gas": (0, 0),
+    "wind": (50, 400),
+    "solar": (0, 250),
+    "biomass": (0, 40),
+    "battery": (0, 20),
+    "coal": (0, 0),
+    "nuclear": (0, 0),
+    "unknown": (0, 30),
+}
+
+PAYLOAD_SHAPES = ("full", "nulls", "missing_breakdown", "empty")
+
+
+class StubConfig:
+    """Behaviour knobs for the stub; all rates are probabilities per request"""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0,
+                 retry_after=1, payload_shape="full"):
+        if payload_shape not in PAYLOAD_SHAPES:
+            raise ValueError(f"payload_shape must be one of {PAYLOAD_SHAPES}")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.payload_shape = payload_shape
+
+
+def iso(dt):
+    return dt.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def make_breakdown(zone, dt, shape="full"):
+    """Deterministic breakdown payload for a zone and hour"""
+    dt = dt.replace(minute=0, second=0, microsecond=0)
+    payload = {"zone": zone, "datetime": iso(dt), "updatedAt": iso(datetime.now(timezone.utc))}
+    if shape == "missing_breakdown":
+        return payload
+    if shape == "empty":
+        payload["powerProductionBreakdown"] = {}
+        return payload
+
+    rng = random.Random(zlib.crc32(f"{zone}{dt.isoformat()}".encode()))
+    breakdown = {source: round(rng.uniform(low, high), 1) for source, (low, high) in SOURCE_RANGES.items()}
+    if shape == "nulls":
+        for source in rng.sample(list(breakdown), 4):
+            breakdown[source] = None
+    payload["powerProductionBreakdown"] = breakdown
+    return payload
+
+
+def parse_datetime(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).astimezone(timezone.utc)
+
+
+class StubServer:
+    """Threaded HTTP server with per-endpoint and per-status call counters"""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or StubConfig()
+        self.calls = Counter()
+        self.statuses = Counter()
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v3"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def stats(self):
+        with self._lock:
+            return {"calls": dict(self.calls), "statuses": dict(self.statuses)}
+
+    def _record(self, endpoint, status):
+        with self._lock:
+            self.calls[endpoint] += 1
+            self.statuses[status] += 1
+
+    def _respond(self, endpoint, params):
+        """(status, headers, body) for one request"""
+        config = self.config
+        roll = random.random()
+        if roll < config.rate_limit_rate:
+            return 429, {"Retry-After": str(config.retry_after)}, {"error": "Too many requests"}
+        if roll < config.rate_limit_rate + config.error_rate:
+            return 503, {}, {"error": "Service unavailable"}
+
+        zone = params.get("zone", ["KE"])[0]
+        now = datetime.now(timezone.utc)
+
+        if endpoint == "power-breakdown/latest":
+            return 200, {}, make_breakdown(zone, now, config.payload_shape)
+
+        if endpoint == "power-breakdown/history":
+            hours = [now - timedelta(hours=h) for h in range(23, -1, -1)]
+        elif endpoint == "power-breakdown/past-range":
+            try:
+                start = parse_datetime(params["start"][0])
+                end = parse_datetime(params["end"][0])
+            except (KeyError, ValueError):
+                return 400, {}, {"error": "start and end are required ISO datetimes"}
+            start = start.replace(minute=0, second=0, microsecond=0)
+            hours = [start + timedelta(hours=h) for h in range(int((end - start).total_seconds() // 3600) + 1)]
+        else:
+            return 404, {}, {"error": f"Unknown endpoint {endpoint}"}
+
+        return 200, {}, {
+            "zone": zone,
+            "history": [make_breakdown(zone, dt, config.payload_shape) for dt in hours],
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                endpoint = url.path.removeprefix("/v3/").strip("/")
+
+                config = server.config
+                if config.latency or config.jitter:
+                    time.sleep(max(0.0, config.latency + random.uniform(-config.jitter, config.jitter)))
+
+                status, headers, payload = server._respond(endpoint, parse_qs(url.query))
+                server._record(endpoint, status)
+
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def add_config_arguments(parser):
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of 429 responses")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--payload-shape", choices=PAYLOAD_SHAPES, default="full")
+
+
+def config_from_args(args):
+    return StubConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        payload_shape=args.payload_shape,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = StubServer(config_from_args(args), args.host, args.port).start()
+    print(f"Serving stub Electricity Maps API at {server.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(server.stats())
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
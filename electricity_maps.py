@@ -0,0 +1,222 @@
+import asyncio
+import bisect
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from lazy_imports import lazy_import
+
+requests = lazy_import("requests")
+
+DEFAULT_BASE_URL = "https://api.electricitymaps.com/v3"
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Breakdown keys counted as renewable when the payload has no renewablePercentage
+RENEWABLE_KEYS = {"hydro", "geothermal", "wind", "solar", "biomass"}
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds), Prometheus style"""
+
+    BOUNDS = [25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ms):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.BOUNDS, ms)] += 1
+            self.total += 1
+            self.sum_ms += ms
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile"""
+        with self._lock:
+            if self.total == 0:
+                return None
+            rank = p / 100 * self.total
+            seen = 0
+            for i, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank:
+                    return self.BOUNDS[i] if i < len(self.BOUNDS) else float("inf")
+        return float("inf")
+
+    def summary(self):
+        return {
+            "count": self.total,
+            "mean_ms": self.sum_ms / self.total if self.total else None,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+        }
+
+
+class RateLimiter:
+    """Thread-safe token bucket; reserve() returns how long to wait for a slot"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or rate
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ElectricityMapsClient:
+    """Pooled, retrying client for the Electricity Maps API"""
+
+    def __init__(self, headers, base_url=DEFAULT_BASE_URL, connect_timeout=3.05,
+                 read_timeout=10, max_retries=3, backoff_base=0.5, backoff_max=8.0,
+                 pool_size=10, requests_per_second=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.latency = {}   # endpoint -> LatencyHistogram
+        # time.monotonic() before which the server has told us not to call it again
+        self.blocked_until = 0.0
+        # One client talks to one host, so this bucket is the per-host limit
+        self.rate_limiter = RateLimiter(requests_per_second) if requests_per_second else None
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff(self, attempt, retry_after=None):
+        """The server's Retry-After plus a little jitter if given, else exponential backoff with full jitter"""
+        if retry_after is not None:
+            # Jitter on top, so workers and replicas told the same thing don't all retry at once
+            return retry_after + random.uniform(0, self.backoff_base)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _observe(self, endpoint, ms):
+        histogram = self.latency.get(endpoint)
+        if histogram is None:
+            histogram = self.latency.setdefault(endpoint, LatencyHistogram())
+        histogram.observe(ms)
+
+    def get(self, endpoint, params=None):
+        """GET an endpoint, retrying transient failures; returns the Response.
+
+        Returns None without calling the server while a Retry-After longer
+        than backoff_max is still running.
+        """
+        if time.monotonic() < self.blocked_until:
+            return None
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            if self.rate_limiter is not None:
+                time.sleep(self.rate_limiter.reserve())
+            start = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                self._observe(endpoint, (time.perf_counter() - start) * 1000)
+                if last_attempt:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            self._observe(endpoint, (time.perf_counter() - start) * 1000)
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None and retry_after > self.backoff_max:
+                # Too long to wait in-line: give up now, and skip this host until the wait is over
+                self.blocked_until = max(self.blocked_until, time.monotonic() + self._backoff(attempt, retry_after))
+                return response
+            time.sleep(self._backoff(attempt, retry_after))
+
+    def power_breakdown_latest(self, zone="KE"):
+        """Latest power breakdown payload for a zone, None if unavailable"""
+        response = self.get("power-breakdown/latest", params={"zone": zone})
+
+        if response is not None and response.status_code == 200:
+            data = response.json()
+            if 'powerProductionBreakdown' in data:
+                return data
+
+        return None
+
+    def latency_summary(self):
+        return {endpoint: h.summary() for endpoint, h in self.latency.items()}
+
+    def close(self):
+        self.session.close()
+
+
+def renewable_share(payload):
+    """Renewable percentage of a power breakdown payload, None if unknown"""
+    if payload is None:
+        return None
+    if payload.get("renewablePercentage") is not None:
+        return payload["renewablePercentage"]
+
+    mix = payload.get("powerProductionBreakdown") or {}
+    total = sum(v for v in mix.values() if v is not None and v > 0)
+    if total <= 0:
+        return None
+    renewable = sum(v for k, v in mix.items() if k in RENEWABLE_KEYS and v is not None and v > 0)
+    return renewable / total * 100
+
+
+async def fetch_zones_async(client, zones, max_concurrency=4, fetch=None):
+    """Fetch the latest breakdown for several zones concurrently.
+
+    Blocking requests run on worker threads, at most max_concurrency at a
+    time; the client's rate limiter still spaces out the upstream calls.
+    Returns a dict of zone -> payload (None for zones that failed).
+    """
+    fetch = fetch or client.power_breakdown_latest
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch_one(zone):
+        async with semaphore:
+            try:
+                return await asyncio.to_thread(fetch, zone)
+            except Exception:
+                return None
+
+    results = await asyncio.gather(*(fetch_one(zone) for zone in zones))
+    return dict(zip(zones, results))
+
+
+def fetch_zones(client, zones, max_concurrency=4, fetch=None):
+    """Synchronous wrapper around fetch_zones_async for Streamlit scripts"""
+    return asyncio.run(fetch_zones_async(client, zones, max_concurrency, fetch))
@@ -1,11 +1,25 @@
 import streamlit as st
-import os
-import requests
-import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
-from datetime import datetime, timedelta
-import numpy as np
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from electricity_maps import DEFAULT_BASE_URL, ElectricityMapsClient, fetch_zones, renewable_share
+from figures import (
+    comparison_figure, history_figure, mix_pie, mix_table, timeline_figures, update_mix_pie
+)
+from history_archive import ARCHIVE_DIR, HistoryArchive
+from instrumentation import TimingRecorder
+from lazy_imports import lazy_import
+from owid_data import CountrySummary, dataset_version
+from power_cache import SnapshotRefresher, TTLCache
+from power_data import SOURCE_MAPPINGS, process_kenya_data
+from rankings import RANK_METRICS, RankIndex
+from regional_aggregates import RegionalAggregates
+from rollups import RESOLUTION_LABELS
+from snapshot_store import DEFAULT_DB, SnapshotStore
+
+# Heavy modules load on first use so a fresh replica starts serving sooner
+pd = lazy_import("pandas")
 
 # Read the API key from streamlit secrets
 API_KEY = st.secrets ["API_KEY"]
@@ -20,95 +34,165 @@ headers = {
     "Content-Type": "application/json"
 }
 
-# Kenya's typical energy mix (fallback data based on recent reports)
-KENYA_ENERGY_MIX = {
-    "Hydro": 36.2,
-    "Geothermal": 31.1,
-    "Thermal (Oil/Gas)": 12.7,
-    "Wind": 8.9,
-    "Solar": 6.8,
-    "Biomass": 2.1,
-    "Battery Storage": 1.2,
-    "Imports": 1.0
+# East African zones shown live in the regional comparison
+REGIONAL_ZONES = {
+    "KE": "Kenya",
+    "UG": "Uganda",
+    "TZ": "Tanzania",
+    "ET": "Ethiopia",
+    "RW": "Rwanda"
 }
 
-def get_kenya_power_data():
+# How long a live breakdown is reused before asking Electricity Maps again.
+# The upstream /latest endpoint only updates every few minutes.
+POWER_CACHE_TTL = int(st.secrets.get("POWER_CACHE_TTL", 300))
+
+# How often the live section reruns by itself to pick up the refresher's latest snapshot
+LIVE_REFRESH_SECONDS = int(st.secrets.get("LIVE_REFRESH_SECONDS", 60))
+
+@st.cache_resource
+def get_power_cache():
+    """Single cache instance shared by every session in this process"""
+    return TTLCache(ttl=POWER_CACHE_TTL)
+
+@st.cache_resource
+def get_power_client():
+    """Pooled Electricity Maps client shared by every session"""
+    return ElectricityMapsClient(
+        headers,
+        base_url=st.secrets.get("ELECTRICITY_MAPS_URL", DEFAULT_BASE_URL)
+    )
+
+def fetch_power_breakdown(zone="KE"):
+    """Fetch the latest power breakdown for a zone, None if unavailable"""
+    return get_power_client().power_breakdown_latest(zone)
+
+@st.cache_resource
+def get_snapshot_store():
+    """Append-only history of every live snapshot the refresher has seen"""
+    return SnapshotStore(st.secrets.get("SNAPSHOT_DB", DEFAULT_DB))
+
+@st.cache_resource
+def get_history_archive():
+    """Parquet history backfilled offline by history_archive.py"""
+    return HistoryArchive(st.secrets.get("HISTORY_ARCHIVE", ARCHIVE_DIR))
+
+@st.cache_resource
+def get_power_refresher(zone="KE"):
+    """Background poller that keeps the latest breakdown for a zone warm"""
+    # Resolve the shared objects here; st.cache_resource calls need a script thread
+    cache, client, store = get_power_cache(), get_power_client(), get_snapshot_store()
+    fetch = lambda: cache.get(zone, lambda: client.power_breakdown_latest(zone))
+    return SnapshotRefresher(
+        fetch,
+        interval=POWER_CACHE_TTL,
+        # Retrying sooner than the cache's negative TTL would only get the cached miss back
+        retry_interval=cache.negative_ttl,
+        on_update=lambda data: store.add(zone, data)
+    ).start()
+
+def get_kenya_power_data(zone="KE"):
     """Try to fetch real data, fallback to static data if API fails"""
+    # Serve the last good snapshot, however stale; the refresher revalidates it
+    snapshot = get_power_refresher(zone).latest()
+    if snapshot is not None:
+        return snapshot.data, True
+    
     try:
-        url = "https://api.electricitymaps.com/v3/power-breakdown/latest"
-        params = {"zone": "KE"}
-        
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        # No snapshot yet - this joins the refresher's in-flight fetch on a cold start
+        data = get_power_cache().get(zone, lambda: fetch_power_breakdown(zone))
         
-        if response.status_code == 200:
-            data = response.json()
-            if 'powerProductionBreakdown' in data:
-                return data, True
-        
-        # If API fails, return None to use fallback data
-        return None, False
+        # If API fails, data is None and we use fallback data
+        return data, data is not None
         
     except Exception as e:
         st.warning(f"Live data unavailable: {str(e)}")
         return None, False
 
-def process_kenya_data(api_data=None, use_live=False):
-    """Process Kenya power data with proper source mapping"""
-    
-    source_mappings = {
-        'hydro': 'Hydro',
-        'geothermal': 'Geothermal', 
-        'oil': 'Thermal (Oil)',
-        'gas': 'Natural Gas',
-        'wind': 'Wind',
-        'solar': 'Solar',
-        'biomass': 'Biomass',
-        'battery': 'Battery Storage',
-        'coal': 'Coal',
-        'nuclear': 'Nuclear',
-        'unknown': 'Other'
+@st.cache_resource
+def get_timing_recorder():
+    """Section timings from every session's reruns in this process"""
+    return TimingRecorder()
+
+def format_age(seconds):
+    """Human readable age such as '45s ago' or '3 min ago'"""
+    if seconds < 60:
+        return f"{seconds:.0f}s ago"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min ago"
+    return f"{seconds / 3600:.1f} h ago"
+
+def format_number(value, suffix="", signed=False):
+    """One-decimal number with a suffix, or None for missing values"""
+    if value is None or pd.isna(value):
+        return None
+    return f"{value:+.1f}{suffix}" if signed else f"{value:.1f}{suffix}"
+
+SOURCE_INFO = {
+    "Hydro": {
+        "capacity": "826 MW",
+        "key_plants": "Seven Forks Cascade, Turkwel, Sondu Miriu",
+        "challenge": "Seasonal rainfall dependency",
+        "advantage": "Reliable baseload power"
+    },
+    "Geothermal": {
+        "capacity": "863 MW", 
+        "key_plants": "Olkaria I-VI, Eburru",
+        "challenge": "High upfront investment",
+        "advantage": "24/7 reliable clean energy"
+    },
+    "Wind": {
+        "capacity": "436 MW",
+        "key_plants": "Lake Turkana Wind Power (310 MW)",
+        "challenge": "Transmission to population centers", 
+        "advantage": "Excellent wind speeds (8-11 m/s)"
+    },
+    "Solar": {
+        "capacity": "173 MW",
+        "key_plants": "Garissa Solar (50 MW), Eldosol (40 MW)",
+        "challenge": "Grid stability and storage",
+        "advantage": "Abundant sunshine year-round"
     }
-    
-    if use_live and api_data and 'powerProductionBreakdown' in api_data:
-        # Use live API data
-        mix = api_data['powerProductionBreakdown']
-        timestamp = api_data.get('datetime', datetime.now().isoformat())
-        
-        records = []
-        total = 0
-        
-        for source, value in mix.items():
-            if value is not None and value > 0:
-                display_name = source_mappings.get(source, source.title())
-                records.append({
-                    "source": display_name,
-                    "value": value,
-                    "percentage": 0  # Will calculate later
-                })
-                total += value
-        
-        # Calculate percentages
-        for record in records:
-            record["percentage"] = (record["value"] / total * 100) if total > 0 else 0
-            
-        return records, timestamp, total, "Live Data"
-    
-    else:
-        # Use fallback data
-        records = []
-        total = sum(KENYA_ENERGY_MIX.values())
-        
-        for source, percentage in KENYA_ENERGY_MIX.items():
-            # Convert percentage to approximate MW (Kenya's total capacity ~3000 MW)
-            estimated_mw = (percentage / 100) * 2800
-            records.append({
-                "source": source,
-                "value": estimated_mw,
-                "percentage": percentage
-            })
-        
-        timestamp = datetime.now().isoformat()
-        return records, timestamp, total * 28, "Estimated Data"
+}
+
+# Figures below only depend on their inputs, so they are built once per
+# process and reused by every rerun instead of going through plotly.express again.
+# Keys come from user input (country x year range), so keep only the most recent ones
+build_timeline_figures = st.cache_resource(max_entries=32)(timeline_figures)
+# Live shares (and the chosen year) change every refresh; only recent figures are reused
+build_comparison_figure = st.cache_resource(max_entries=8)(comparison_figure)
+
+@st.cache_resource(max_entries=1)
+def get_regional_aggregates(version):
+    """Regional aggregates artifact (see regional_aggregates.py) for one dataset version; None without the dataset"""
+    if version is None:
+        return None
+    try:
+        return RegionalAggregates.load()
+    except FileNotFoundError:
+        return None
+
+@st.cache_resource(max_entries=1)
+def get_rank_index(version):
+    """Per-year rankings for one OWID dataset version; a rebuilt dataset gets a fresh index"""
+    return RankIndex.load()
+
+def current_dataset_version():
+    """dataset_version() for keying the OWID caches below; None without the dataset"""
+    try:
+        return dataset_version()
+    except FileNotFoundError:
+        return None
+
+@st.cache_resource(max_entries=1)
+def get_country_summary(version):
+    """Yearly OWID series for every country for one dataset version; None without the dataset"""
+    if version is None:
+        return None
+    try:
+        return CountrySummary.load()
+    except FileNotFoundError:
+        return None
 
 def create_kenya_insights():
     """Create educational content about Kenya's power sector"""
@@ -126,72 +210,71 @@ def create_kenya_insights():
     - **Target**: 100% renewable electricity by 2030
     """)
     
-    # Kenya energy timeline
-    timeline_data = {
-        "Year": [2014, 2016, 2018, 2020, 2022, 2024],
-        "Renewable %": [68, 75, 83, 87, 92, 95],
-        "Total Capacity (MW)": [2000, 2300, 2700, 2900, 3100, 3300]
-    }
-    
-    timeline_df = pd.DataFrame(timeline_data)
+    summary = get_country_summary(current_dataset_version())
+    if summary is None:
+        st.info("Add owid-energy-data.csv next to the app to see the historical trends.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        countries = summary.countries
+        country = st.selectbox("Country", countries, index=countries.index("Kenya") if "Kenya" in countries else 0)
+    with col2:
+        year_range = st.slider("Years", summary.first_year, summary.last_year, (2000, summary.last_year))
+
+    # Precomputed per-country arrays, so this is a slice rather than a scan of the CSV
+    series = summary.series(country, year_range)
+    if not series["year"]:
+        st.caption(f"No OWID electricity data for {country} in these years.")
+        return
+
+    fig_timeline, fig_generation = build_timeline_figures(
+        country,
+        series["year"],
+        series["renewables_share_elec"],
+        series["electricity_generation"],
+        series["electricity_generation_yoy_pct"]
+    )
     
     col1, col2 = st.columns(2)
     
     with col1:
-        fig_timeline = px.line(
-            timeline_df, 
-            x="Year", 
-            y="Renewable %",
-            title="Kenya's Renewable Energy Progress",
-            markers=True,
-            color_discrete_sequence=["#2E8B57"]
-        )
-        fig_timeline.update_layout(yaxis_title="Renewable Energy (%)")
         st.plotly_chart(fig_timeline, use_container_width=True)
     
     with col2:
-        fig_capacity = px.bar(
-            timeline_df,
-            x="Year",
-            y="Total Capacity (MW)",
-            title="Total Generation Capacity Growth",
-            color_discrete_sequence=["#FF6B35"]
+        st.plotly_chart(fig_generation, use_container_width=True)
+
+    # Growth for the last year shown, precomputed for every country by growth_frame()
+    latest = {name: values[-1] for name, values in series.items()}
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.metric(
+            label=f"Generation {latest['year']}",
+            value=format_number(latest['electricity_generation'], " TWh"),
+            delta=format_number(latest['electricity_generation_yoy_pct'], "% vs previous year", signed=True)
+        )
+
+    with col2:
+        st.metric(
+            label="Generation CAGR (10 years)",
+            value=format_number(latest['electricity_generation_cagr_10y'], "% a year", signed=True),
+            help="Compound annual growth in electricity generation over the previous 10 years"
+        )
+
+    with col3:
+        st.metric(
+            label="Renewable Share (3-year average)",
+            value=format_number(latest['renewables_share_elec_rolling_3y'], "%"),
+            delta=format_number(latest['renewables_share_elec_yoy'], " pts vs previous year", signed=True)
         )
-        st.plotly_chart(fig_capacity, use_container_width=True)
 
 def display_source_details():
     """Display detailed information about each energy source in Kenya"""
     
-    source_info = {
-        "Hydro": {
-            "capacity": "826 MW",
-            "key_plants": "Seven Forks Cascade, Turkwel, Sondu Miriu",
-            "challenge": "Seasonal rainfall dependency",
-            "advantage": "Reliable baseload power"
-        },
-        "Geothermal": {
-            "capacity": "863 MW", 
-            "key_plants": "Olkaria I-VI, Eburru",
-            "challenge": "High upfront investment",
-            "advantage": "24/7 reliable clean energy"
-        },
-        "Wind": {
-            "capacity": "436 MW",
-            "key_plants": "Lake Turkana Wind Power (310 MW)",
-            "challenge": "Transmission to population centers", 
-            "advantage": "Excellent wind speeds (8-11 m/s)"
-        },
-        "Solar": {
-            "capacity": "173 MW",
-            "key_plants": "Garissa Solar (50 MW), Eldosol (40 MW)",
-            "challenge": "Grid stability and storage",
-            "advantage": "Abundant sunshine year-round"
-        }
-    }
-    
     st.subheader("Energy Source Deep Dive")
     
-    for source, info in source_info.items():
+    for source, info in SOURCE_INFO.items():
         with st.expander(f"{source} - {info['capacity']} installed"):
             col1, col2 = st.columns(2)
             
@@ -209,134 +292,280 @@ st.set_page_config(
     layout="wide"
 )
 
-st.title("Kenya Electricity Generation Dashboard")
-st.markdown("*Exploring Kenya's renewable energy leadership in Africa*")
+# Per-rerun section timings, aggregated across sessions
+rerun = get_timing_recorder().start_rerun()
 
-# Try to get live data
-with st.spinner("Fetching Kenya electricity data..."):
-    api_data, has_live_data = get_kenya_power_data()
+@contextmanager
+def fragment_timer(name):
+    """Time a fragment inside the full rerun, or on its own when only the fragment reruns"""
+    if not rerun.finished:
+        yield rerun
+        return
+    # Fragment-only rerun: the script's timer has already been recorded
+    timer = get_timing_recorder().start_rerun(total=f"{name} fragment")
+    try:
+        yield timer
+    finally:
+        timer.finish()
 
-# Process the data
-records, timestamp, total_mw, data_source = process_kenya_data(api_data, has_live_data)
+def live_view(api_data, has_live_data):
+    """This session's processed live mix, pie and table, rebuilt only when the upstream datetime changes"""
+    version = (has_live_data, api_data.get("datetime") if has_live_data else None)
+    view = st.session_state.get("live_view")
+    if view is not None and view["version"] == version:
+        # Nothing new upstream: re-send the same figure and values untouched
+        view["skipped"] += 1
+        get_timing_recorder().increment("live_refresh_skipped")
+        return view
 
-# Main dashboard
-col1, col2, col3 = st.columns([2, 1, 1])
+    mix_df, timestamp, total_mw, data_source = process_kenya_data(api_data, has_live_data)
+    if view is None:
+        view = st.session_state["live_view"] = {"skipped": 0, "fig": None}
+    if not mix_df.empty:
+        # Only the pie trace's values change, so patch the existing figure in place
+        if view["fig"] is None:
+            view["fig"] = mix_pie(mix_df, data_source)
+        else:
+            update_mix_pie(view["fig"], mix_df, data_source)
 
-with col1:
-    # Main pie chart
-    if records:
-        df = pd.DataFrame(records)
-        
-        # Custom colors for Kenya energy sources
-        colors = {
-            'Hydro': '#1f77b4',
-            'Geothermal': '#ff7f0e', 
-            'Thermal (Oil/Gas)': '#d62728',
-            'Thermal (Oil)': '#d62728',
-            'Natural Gas': '#ff6b6b',
-            'Wind': '#2ca02c',
-            'Solar': '#ffbb33',
-            'Biomass': '#8c564b',
-            'Battery Storage': '#9467bd',
-            'Imports': '#17becf',
-            'Other': '#bcbd22'
+    # Calculate renewable percentage
+    renewable_sources = ['Hydro', 'Geothermal', 'Wind', 'Solar', 'Biomass']
+    view.update(
+        version=version,
+        mix_df=mix_df,
+        table=mix_table(mix_df) if not mix_df.empty else None,
+        timestamp=timestamp,
+        total_mw=total_mw,
+        data_source=data_source,
+        renewable_pct=mix_df.loc[mix_df['source'].isin(renewable_sources), 'percentage'].sum()
+    )
+    return view
+
+def live_section():
+    """Live mix, metrics and breakdown table; with auto-refresh on it reruns by itself"""
+    with fragment_timer("live") as timer:
+        # Try to get live data
+        with timer.span("fetch"), st.spinner("Fetching Kenya electricity data..."):
+            api_data, has_live_data = get_kenya_power_data()
+
+        # Process the data
+        with timer.span("process"):
+            view = live_view(api_data, has_live_data)
+            timestamp, total_mw, data_source = view["timestamp"], view["total_mw"], view["data_source"]
+
+        # Main dashboard
+        col1, col2, col3 = st.columns([2, 1, 1])
+
+        with col1, timer.span("pie"):
+            # Main pie chart
+            if view["fig"] is not None and not view["mix_df"].empty:
+                st.plotly_chart(view["fig"], use_container_width=True)
+
+        with col2, timer.span("metrics"):
+            st.metric(
+                label="Total Generation", 
+                value=f"{total_mw:.0f} MW",
+                help="Current total electricity generation"
+            )
+            
+            st.metric(
+                label="Renewable Share",
+                value=f"{view['renewable_pct']:.1f}%",
+                delta="World leader!",
+                help="Percentage from renewable sources"
+            )
+
+        with col3, timer.span("metrics"):
+            st.metric(
+                label="Data Source",
+                value=data_source,
+                help="Whether using live or estimated data"
+            )
+            
+            snapshot = get_power_refresher("KE").latest()
+            st.metric(
+                label="Last Updated",
+                value=datetime.fromisoformat(timestamp.replace('Z', '+00:00')).strftime('%H:%M') if 'T' in timestamp else "Recent",
+                delta=f"fetched {format_age(snapshot.age)}" if has_live_data and snapshot else None,
+                delta_color="off",
+                help="When the data was last refreshed"
+            )
+            
+            cache_stats = get_power_cache().stats()
+            cache_age = get_power_cache().age("KE")
+            latency = get_power_client().latency_summary().get("power-breakdown/latest")
+            st.caption(
+                f"Cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses"
+                + (f" · data age {cache_age:.0f}s" if cache_age is not None else "")
+                + (f" · API p50 ≤{latency['p50_ms']}ms, p99 ≤{latency['p99_ms']}ms" if latency else "")
+                + (f" · {view['skipped']} unchanged refreshes skipped" if view['skipped'] else "")
+            )
+
+        # Data table
+        with timer.span("table"):
+            st.subheader("Detailed Breakdown")
+            if view["table"] is not None:
+                st.dataframe(
+                    view["table"],
+                    use_container_width=True,
+                    hide_index=True
+                )
+
+    return data_source
+
+@st.fragment
+def history_section():
+    """Generation history recorded from live snapshots; the window radio only reruns this"""
+    with fragment_timer("history") as timer, timer.span("history"):
+        st.subheader("Generation History")
+        history_windows = {
+            "Last 24h": 24 * 3600,
+            "Last 7 days": 7 * 24 * 3600,
+            "Last 30 days": 30 * 24 * 3600,
+            "Last 12 months": 365 * 24 * 3600
         }
-        
-        fig = px.pie(
-            df, 
-            values='percentage', 
-            names='source',
-            title=f"Current Energy Mix ({data_source})",
-            hole=0.4,
-            color='source',
-            color_discrete_map=colors
-        )
-        
-        fig.update_traces(
-            textposition='inside',
-            textinfo='percent+label',
-            hovertemplate='<b>%{label}</b><br>Share: %{percent}<br>Generation: %{value:.0f}%<extra></extra>'
+        history_window = st.radio("Window", list(history_windows), horizontal=True, label_visibility="collapsed")
+        # Rollups keep long windows to a few hundred points instead of every 5-minute snapshot
+        history_start = time.time() - history_windows[history_window]
+        history_resolution, history_df = get_snapshot_store().query_auto("KE", history_start, time.time())
+        # Anything older than our first live snapshot comes from the offline backfill
+        history_df = get_history_archive().fill_before(history_df, "KE", history_start, history_resolution)
+
+        if history_df.empty:
+            st.info(
+                "No history recorded yet - it builds up while live data is available, "
+                "or backfill it with `python history_archive.py`."
+            )
+        else:
+            history_df['source'] = history_df['source'].map(lambda s: SOURCE_MAPPINGS.get(s, s.title()))
+            fig_history = history_figure(
+                history_df,
+                f"Generation Mix - {history_window} ({RESOLUTION_LABELS[history_resolution]})"
+            )
+            st.plotly_chart(fig_history, use_container_width=True)
+
+@st.fragment
+def insights_section():
+    """Educational content"""
+    with fragment_timer("insights") as timer, timer.span("insights"):
+        create_kenya_insights()
+        display_source_details()
+
+@st.fragment
+def comparison_section():
+    """Kenya and its neighbours against regional renewable averages"""
+    with fragment_timer("comparison") as timer, timer.span("comparison"):
+        st.subheader("Kenya vs. Regional Averages")
+
+        comparison_data = {
+            'Region': ['Kenya', 'East Africa Avg', 'Sub-Saharan Africa', 'Global Average'],
+            'Renewable Share (%)': [92, 65, 45, 29],
+            'Access Rate (%)': [75, 45, 48, 90]
+        }
+
+        # Fetch every zone concurrently; each one still goes through the shared cache
+        power_cache, power_client = get_power_cache(), get_power_client()
+        regional_payloads = fetch_zones(
+            power_client,
+            list(REGIONAL_ZONES),
+            fetch=lambda zone: power_cache.get(zone, lambda: power_client.power_breakdown_latest(zone))
         )
-        
-        fig.update_layout(
-            showlegend=True,
-            legend=dict(orientation="v", yanchor="middle", y=0.5, xanchor="left", x=1.05)
+
+        zone_rows = []
+        for zone, name in REGIONAL_ZONES.items():
+            share = renewable_share(regional_payloads.get(zone))
+            if share is None and zone == "KE":
+                share = comparison_data['Renewable Share (%)'][0]
+            if share is not None:
+                zone_rows.append({'Region': name, 'Renewable Share (%)': round(share, 1)})
+
+        aggregates = get_regional_aggregates(current_dataset_version())
+        if aggregates is None:
+            # No OWID dataset: fall back to the static regional averages
+            region_rows = [
+                {'Region': region, 'Renewable Share (%)': share}
+                for region, share in zip(comparison_data['Region'][1:], comparison_data['Renewable Share (%)'][1:])
+            ]
+        else:
+            # Precomputed generation-weighted aggregates, looked up for the chosen year
+            latest = min(filter(None, (aggregates.latest_year(region) for region in aggregates.regions)))
+            years = sorted(set(aggregates.df['year'].tolist()), reverse=True)
+            year = st.selectbox("Year for regional averages", years, index=years.index(latest))
+            region_rows = []
+            for region in aggregates.regions:
+                row = aggregates.get(region, year)
+                if row is not None and pd.notna(row['renewable_share']):
+                    region_rows.append({'Region': f"{region} ({year})", 'Renewable Share (%)': round(row['renewable_share'], 1)})
+
+        # Live zones first, then the regional averages
+        comparison_rows = zone_rows + region_rows
+
+        fig_comparison = build_comparison_figure(
+            tuple(row['Region'] for row in comparison_rows),
+            tuple(row['Renewable Share (%)'] for row in comparison_rows)
         )
-        
-        st.plotly_chart(fig, use_container_width=True)
 
-with col2:
-    st.metric(
-        label="Total Generation", 
-        value=f"{total_mw:.0f} MW",
-        help="Current total electricity generation"
-    )
-    
-    # Calculate renewable percentage
-    renewable_sources = ['Hydro', 'Geothermal', 'Wind', 'Solar', 'Biomass']
-    renewable_pct = sum([r['percentage'] for r in records if r['source'] in renewable_sources])
-    
-    st.metric(
-        label="Renewable Share",
-        value=f"{renewable_pct:.1f}%",
-        delta="World leader!",
-        help="Percentage from renewable sources"
-    )
+        st.plotly_chart(fig_comparison, use_container_width=True)
 
-with col3:
-    st.metric(
-        label="Data Source",
-        value=data_source,
-        help="Whether using live or estimated data"
-    )
-    
-    st.metric(
-        label="Last Updated",
-        value=datetime.fromisoformat(timestamp.replace('Z', '+00:00')).strftime('%H:%M') if 'T' in timestamp else "Recent",
-        help="When the data was last refreshed"
-    )
+@st.fragment
+def leaderboard_section():
+    """Top countries for a metric and year, and where Kenya ranks, from the precomputed rank index"""
+    with fragment_timer("leaderboard") as timer, timer.span("leaderboard"):
+        st.subheader("Global Leaderboard")
 
-# Data table
-st.subheader("Detailed Breakdown")
-if records:
-    display_df = pd.DataFrame(records)
-    display_df['Generation (MW)'] = display_df['value'].round(0)
-    display_df['Share (%)'] = display_df['percentage'].round(1)
-    
-    # Sort by percentage
-    display_df = display_df.sort_values('percentage', ascending=False)
-    
-    st.dataframe(
-        display_df[['source', 'Share (%)', 'Generation (MW)']].rename(columns={'source': 'Energy Source'}),
-        use_container_width=True,
-        hide_index=True
-    )
+        try:
+            rank_index = get_rank_index(dataset_version())
+        except FileNotFoundError:
+            st.info("Add owid-energy-data.csv next to the app to see country rankings.")
+            return
 
-# Educational content
-create_kenya_insights()
-display_source_details()
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            metric = st.selectbox("Metric", list(RANK_METRICS), format_func=RANK_METRICS.get)
+        with col2:
+            years = rank_index.years(metric)[::-1]
+            year = st.selectbox("Ranking year", years, index=years.index(rank_index.latest_year(metric)))
+        with col3:
+            top_n = st.slider("Countries shown", 5, 30, 10)
 
-# Regional comparison
-st.subheader("Kenya vs. Regional Averages")
+        kenya = rank_index.rank(metric, year, "Kenya")
+        if kenya is not None:
+            rank, total = kenya
+            st.metric(
+                label=f"Kenya's rank in {year}",
+                value=f"#{rank} of {total}",
+                delta=f"ahead of {rank_index.percentile(metric, year, 'Kenya'):.0f}% of countries",
+                delta_color="off"
+            )
+        else:
+            st.caption(f"No {RANK_METRICS[metric].lower()} figure for Kenya in {year}.")
 
-comparison_data = {
-    'Region': ['Kenya', 'East Africa Avg', 'Sub-Saharan Africa', 'Global Average'],
-    'Renewable Share (%)': [92, 65, 45, 29],
-    'Access Rate (%)': [75, 45, 48, 90]
-}
+        leaders = rank_index.top(metric, year, top_n)
+        st.dataframe(
+            leaders.round(1).rename(columns={"Value": RANK_METRICS[metric]}),
+            use_container_width=True,
+            hide_index=True
+        )
+        median = rank_index.value_at_percentile(metric, year, 50)
+        if median is not None:
+            st.caption(f"Median country: {median:.1f} · {rank_index.count(metric, year)} countries reporting")
 
-comparison_df = pd.DataFrame(comparison_data)
+st.title("Kenya Electricity Generation Dashboard")
+st.markdown("*Exploring Kenya's renewable energy leadership in Africa*")
 
-fig_comparison = px.bar(
-    comparison_df,
-    x='Region',
-    y='Renewable Share (%)',
-    title="Renewable Energy Share Comparison",
-    color='Renewable Share (%)',
-    color_continuous_scale='Greens'
+# Auto-refresh reruns only the live section, which redraws only when upstream data changed
+auto_refresh = st.sidebar.toggle(
+    "Auto-refresh live data",
+    value=True,
+    help=f"Check for new live data every {LIVE_REFRESH_SECONDS}s without reloading the page"
 )
 
-st.plotly_chart(fig_comparison, use_container_width=True)
+# Each section is a fragment, so a widget change only reruns its own section
+data_source = st.fragment(live_section, run_every=LIVE_REFRESH_SECONDS if auto_refresh else None)()
+history_section()
+insights_section()
+comparison_section()
+leaderboard_section()
 
 # Footer
 st.markdown("---")
@@ -363,3 +592,28 @@ with st.expander("About Kenya's Energy Sector"):
     - Distributed solar systems and mini-grids
     - Regional power trading with neighboring countries
     """)
+
+rerun.finish()
+
+# Optional debug panel: add ?debug=timings to the URL or set DEBUG_TIMINGS in secrets
+if st.query_params.get("debug") == "timings" or st.secrets.get("DEBUG_TIMINGS", False):
+    with st.sidebar:
+        st.subheader("Rerun timings")
+        st.caption(f"This rerun: {rerun.spans['total'] * 1000:.0f} ms")
+        timing_summary = get_timing_recorder().summary()
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "Section": name,
+                    "Last (ms)": rerun.spans.get(name, 0) * 1000,
+                    "p50 (ms)": row["p50"] * 1000,
+                    "p90 (ms)": row["p90"] * 1000,
+                    "p99 (ms)": row["p99"] * 1000,
+                    "Reruns": row["count"]
+                }
+                for name, row in timing_summary.items()
+            ]).round(1),
+            hide_index=True
+        )
+        with st.expander("Prometheus export"):
+            st.code(get_timing_recorder().prometheus_text(), language="text")
@@ -0,0 +1,129 @@
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+px = lazy_import("plotly.express")
+
+# Custom colors for Kenya energy sources
+SOURCE_COLORS = {
+    'Hydro': '#1f77b4',
+    'Geothermal': '#ff7f0e',
+    'Thermal (Oil/Gas)': '#d62728',
+    'Thermal (Oil)': '#d62728',
+    'Natural Gas': '#ff6b6b',
+    'Wind': '#2ca02c',
+    'Solar': '#ffbb33',
+    'Biomass': '#8c564b',
+    'Battery Storage': '#9467bd',
+    'Imports': '#17becf',
+    'Other': '#bcbd22'
+}
+
+
+def timeline_figures(country, years, renewable_shares, generation, generation_yoy_pct=None):
+    """Renewable share and generation charts from yearly series (tuples, so they hash cheaply)"""
+    timeline_df = pd.DataFrame({
+        "Year": years,
+        "Renewable %": renewable_shares,
+        "Generation (TWh)": generation
+    })
+
+    fig_timeline = px.line(
+        timeline_df,
+        x="Year",
+        y="Renewable %",
+        title=f"{country}'s Renewable Energy Progress",
+        markers=True,
+        color_discrete_sequence=["#2E8B57"]
+    )
+    fig_timeline.update_layout(yaxis_title="Renewable Electricity (%)")
+
+    fig_generation = px.bar(
+        timeline_df,
+        x="Year",
+        y="Generation (TWh)",
+        title="Electricity Generation Growth",
+        color_discrete_sequence=["#FF6B35"]
+    )
+    if generation_yoy_pct is not None:
+        # Label each bar with its change from the year before
+        fig_generation.update_traces(
+            text=["" if pd.isna(pct) else f"{pct:+.1f}%" for pct in generation_yoy_pct],
+            textposition="outside"
+        )
+    return fig_timeline, fig_generation
+
+
+def comparison_figure(regions, shares):
+    """Renewable share bar chart; regions and shares are tuples so they hash cheaply"""
+    comparison_df = pd.DataFrame({'Region': regions, 'Renewable Share (%)': shares})
+
+    return px.bar(
+        comparison_df,
+        x='Region',
+        y='Renewable Share (%)',
+        title="Renewable Energy Share Comparison",
+        color='Renewable Share (%)',
+        color_continuous_scale='Greens'
+    )
+
+
+def history_figure(history_df, title):
+    """Stacked area chart of generation by source over time"""
+    return px.area(
+        history_df,
+        x='datetime',
+        y='mw',
+        color='source',
+        title=title,
+        labels={'datetime': 'Time', 'mw': 'Generation (MW)', 'source': 'Source'}
+    )
+
+
+def mix_pie(mix_df, data_source):
+    """Donut chart of the current energy mix"""
+    fig = px.pie(
+        mix_df,
+        values='percentage',
+        names='source',
+        title=f"Current Energy Mix ({data_source})",
+        hole=0.4,
+        color='source',
+        color_discrete_map=SOURCE_COLORS
+    )
+
+    fig.update_traces(
+        textposition='inside',
+        textinfo='percent+label',
+        hovertemplate='<b>%{label}</b><br>Share: %{percent}<br>Generation: %{value:.0f}%<extra></extra>'
+    )
+
+    fig.update_layout(
+        showlegend=True,
+        legend=dict(orientation="v", yanchor="middle", y=0.5, xanchor="left", x=1.05)
+    )
+    return fig
+
+
+def update_mix_pie(fig, mix_df, data_source):
+    """Swap new values into an existing mix_pie figure instead of rebuilding it"""
+    sources = list(mix_df['source'])
+    fig.update_traces(
+        labels=sources,
+        values=mix_df['percentage'],
+        customdata=[[source] for source in sources],
+        marker_colors=[SOURCE_COLORS.get(source, SOURCE_COLORS['Other']) for source in sources]
+    )
+    fig.update_layout(title_text=f"Current Energy Mix ({data_source})")
+    return fig
+
+
+def mix_table(mix_df):
+    """Detailed breakdown table, largest share first"""
+    display_df = mix_df.copy()
+    display_df['Generation (MW)'] = display_df['value'].round(0)
+    display_df['Share (%)'] = display_df['percentage'].round(1)
+
+    # Sort by percentage
+    display_df = display_df.sort_values('percentage', ascending=False)
+
+    return display_df[['source', 'Share (%)', 'Generation (MW)']].rename(columns={'source': 'Energy Source'})
@@ -0,0 +1,270 @@
+"""Offline backfill of Electricity Maps history into local Parquet files.
+
+    python history_archive.py --zones KE UG TZ --start 2024-01-01 --end 2024-07-01
+
+Fetches power-breakdown/past-range in chunks of at most --chunk-days, a few
+chunks at a time, and writes each chunk to
+history/archive/zone=<zone>/year=<year>/<start>_<end>.parquet (zstd). Finished
+chunks are recorded in history/archive/_checkpoint.json, so an interrupted run
+picks up where it stopped when started again with the same arguments. The
+dashboard's history chart reads these files for anything older than its own
+live snapshots.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from electricity_maps import DEFAULT_BASE_URL, ElectricityMapsClient
+from lazy_imports import lazy_import
+from rollups import RESOLUTIONS, add_renewable_share
+from snapshot_store import parse_timestamp
+
+pd = lazy_import("pandas")
+
+ARCHIVE_DIR = Path(__file__).with_name("history") / "archive"
+
+# Longest range past-range serves hourly data for in one request
+MAX_CHUNK_DAYS = 10
+
+COLUMNS = ["ts", "source", "mw"]
+
+
+def chunk_ranges(start, end, chunk_days=MAX_CHUNK_DAYS):
+    """Split [start, end) into chunks of at most chunk_days that never cross a year boundary"""
+    chunks = []
+    while start < end:
+        next_year = datetime(start.year + 1, 1, 1, tzinfo=start.tzinfo)
+        chunk_end = min(start + timedelta(days=chunk_days), next_year, end)
+        chunks.append((start, chunk_end))
+        start = chunk_end
+    return chunks
+
+
+def history_rows(payloads):
+    """Long (ts, source, mw) frame for a list of breakdown payloads, same shape as SnapshotStore"""
+    rows = [
+        (parse_timestamp(p["datetime"]), source, value)
+        for p in payloads if p.get("datetime")
+        for source, value in (p.get("powerProductionBreakdown") or {}).items()
+        if value is not None
+    ]
+    df = pd.DataFrame(rows, columns=COLUMNS)
+    df["ts"] = df["ts"].astype("int64")
+    df["source"] = df["source"].astype("category")
+    return df
+
+
+def chunk_path(root, zone, start, end):
+    return Path(root) / f"zone={zone}" / f"year={start.year}" / f"{start:%Y%m%dT%H}_{end:%Y%m%dT%H}.parquet"
+
+
+class Checkpoint:
+    """Set of finished chunk keys persisted as JSON; each mark rewrites the file atomically"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.done = json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def mark(self, key, rows):
+        with self._lock:
+            self.done[key] = rows
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.done, indent=0, sort_keys=True))
+            os.replace(tmp, self.path)
+
+
+def fetch_chunk(client, zone, start, end):
+    """Payloads for one zone and chunk; raises on a failed request so the chunk is retried next run"""
+    response = client.get("power-breakdown/past-range", params={
+        "zone": zone,
+        "start": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "end": end.strftime("%Y-%m-%dT%H:%M:%SZ"),
+    })
+    if response is None:
+        raise RuntimeError(f"{zone} {start:%Y-%m-%d}: server asked us to back off")
+    if response.status_code != 200:
+        raise RuntimeError(f"{zone} {start:%Y-%m-%d}: HTTP {response.status_code}")
+    return response.json().get("history", [])
+
+
+def ingest_chunk(client, root, zone, start, end):
+    """Fetch and write one chunk; returns its row count"""
+    df = history_rows(fetch_chunk(client, zone, start, end))
+    # past-range includes the end hour, which the next chunk starts with
+    df = df[(df["ts"] >= start.timestamp()) & (df["ts"] < end.timestamp())]
+    if df.empty:
+        return 0
+
+    path = chunk_path(root, zone, start, end)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    df.to_parquet(tmp, compression="zstd", index=False)
+    os.replace(tmp, path)
+    return len(df)
+
+
+def ingest(client, zones, start, end, root=ARCHIVE_DIR, chunk_days=MAX_CHUNK_DAYS, concurrency=4, log=print):
+    """Backfill every zone over [start, end); returns a report dict"""
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    checkpoint = Checkpoint(root / "_checkpoint.json")
+
+    tasks = [
+        (zone, chunk_start, chunk_end)
+        for zone in zones
+        for chunk_start, chunk_end in chunk_ranges(start, end, chunk_days)
+    ]
+    pending = [t for t in tasks if f"{t[0]}/{t[1]:%Y%m%dT%H}/{t[2]:%Y%m%dT%H}" not in checkpoint]
+    log(f"{len(tasks)} chunks, {len(tasks) - len(pending)} already done")
+
+    rows_by_zone = {zone: 0 for zone in zones}
+    failures = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(ingest_chunk, client, root, *task): task for task in pending}
+        for future in as_completed(futures):
+            zone, chunk_start, chunk_end = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                failures.append((zone, chunk_start, str(e)))
+                log(f"failed {zone} {chunk_start:%Y-%m-%d}: {e}")
+                continue
+            checkpoint.mark(f"{zone}/{chunk_start:%Y%m%dT%H}/{chunk_end:%Y%m%dT%H}", rows)
+            rows_by_zone[zone] += rows
+    elapsed = time.perf_counter() - started
+
+    total = sum(rows_by_zone.values())
+    return {
+        "chunks": len(pending),
+        "failed": failures,
+        "rows": total,
+        "rows_by_zone": rows_by_zone,
+        "seconds": elapsed,
+        "rows_per_second": total / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+class HistoryArchive:
+    """Read side of the Parquet archive, returning frames shaped like SnapshotStore.query_auto"""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = Path(root)
+
+    def query(self, zone, start, end, resolution="raw"):
+        """Rows for a zone in [start, end] (epoch seconds), averaged into resolution buckets"""
+        start_year = datetime.fromtimestamp(start, timezone.utc).year
+        end_year = datetime.fromtimestamp(end, timezone.utc).year
+        # Year partitions let us skip every file outside the window
+        files = [
+            f
+            for year in range(start_year, end_year + 1)
+            for f in sorted((self.root / f"zone={zone}" / f"year={year}").glob("*.parquet"))
+        ]
+        if not files:
+            df = pd.DataFrame({"ts": [], "source": [], "mw": [], "min_mw": [], "max_mw": []})
+        else:
+            filters = [("ts", ">=", int(start)), ("ts", "<=", int(end))]
+            df = pd.concat([pd.read_parquet(f, filters=filters) for f in files], ignore_index=True)
+            df["source"] = df["source"].astype(str)
+            df = self._bucket(df, resolution)
+
+        df = add_renewable_share(df)
+        df["datetime"] = pd.to_datetime(df["ts"], unit="s", utc=True)
+        return df
+
+    @staticmethod
+    def _bucket(df, resolution):
+        if resolution == "raw":
+            df["min_mw"] = df["max_mw"] = df["mw"]
+            return df
+        if resolution == "month":
+            months = pd.to_datetime(df["ts"], unit="s").dt.to_period("M").dt.start_time
+            df["ts"] = (months - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+        else:
+            width = RESOLUTIONS[resolution][0]
+            df["ts"] = df["ts"] - df["ts"] % width
+        return (
+            df.groupby(["ts", "source"], as_index=False)
+            .agg(mw=("mw", "mean"), min_mw=("mw", "min"), max_mw=("mw", "max"))
+        )
+
+    def fill_before(self, df, zone, start, resolution):
+        """Prepend archived buckets older than the first row of a SnapshotStore.query_auto frame"""
+        cutoff = df["ts"].min() if not df.empty else time.time()
+        # Rollup frames start one bucket early, match that
+        bucket_start = start - RESOLUTIONS[resolution][0] if resolution in RESOLUTIONS else start
+        archived = self.query(zone, bucket_start, cutoff - 1, resolution)
+        archived = archived[archived["ts"] < cutoff]
+        if archived.empty:
+            return df
+        if df.empty:
+            return archived.reset_index(drop=True)
+        return pd.concat([archived, df[archived.columns]], ignore_index=True)
+
+
+def parse_date(value):
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+def default_api_key():
+    """API key from ELECTRICITY_MAPS_API_KEY, else the dashboard's .streamlit/secrets.toml"""
+    if os.environ.get("ELECTRICITY_MAPS_API_KEY"):
+        return os.environ["ELECTRICITY_MAPS_API_KEY"]
+    secrets = Path(__file__).with_name(".streamlit") / "secrets.toml"
+    if secrets.exists():
+        import tomllib
+        return tomllib.loads(secrets.read_text()).get("API_KEY")
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--zones", nargs="+", default=["KE"])
+    parser.add_argument("--start", type=parse_date, required=True, help="first day, YYYY-MM-DD (UTC)")
+    parser.add_argument("--end", type=parse_date, required=True, help="day after the last one, YYYY-MM-DD (UTC)")
+    parser.add_argument("--chunk-days", type=int, default=MAX_CHUNK_DAYS)
+    parser.add_argument("--concurrency", type=int, default=4, help="chunks in flight at once")
+    parser.add_argument("--requests-per-second", type=float, default=5)
+    parser.add_argument("--out", type=Path, default=ARCHIVE_DIR)
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument("--api-key", default=default_api_key())
+    args = parser.parse_args()
+
+    if not args.api_key:
+        parser.error("no API key: pass --api-key or set ELECTRICITY_MAPS_API_KEY")
+    if args.chunk_days > MAX_CHUNK_DAYS:
+        parser.error(f"--chunk-days can be at most {MAX_CHUNK_DAYS}")
+
+    client = ElectricityMapsClient(
+        {"auth-token": args.api_key},
+        base_url=args.base_url,
+        pool_size=args.concurrency,
+        requests_per_second=args.requests_per_second
+    )
+    try:
+        report = ingest(client, args.zones, args.start, args.end, args.out, args.chunk_days, args.concurrency)
+    finally:
+        client.close()
+
+    print(f"{report['rows']} rows from {report['chunks']} chunks in {report['seconds']:.1f}s "
+          f"({report['rows_per_second']:.0f} rows/s)")
+    for zone, rows in report["rows_by_zone"].items():
+        print(f"  {zone}: {rows} rows")
+    if report["failed"]:
+        print(f"{len(report['failed'])} chunks failed; run again to retry them")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
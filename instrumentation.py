@@ -0,0 +1,98 @@
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+
+class RerunTimer:
+    """Span durations for a single script rerun"""
+
+    def __init__(self, recorder, total="total"):
+        self.recorder = recorder
+        self.total = total
+        self.spans = {}
+        self.finished = False
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans[name] = self.spans.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self):
+        """Record this rerun's spans (plus the total span) with the recorder"""
+        self.spans[self.total] = time.perf_counter() - self._start
+        self.finished = True
+        self.recorder.record(self.spans)
+        return self.spans
+
+
+class TimingRecorder:
+    """Process-wide store of recent span durations, with percentile summaries.
+
+    Keeps the last ``window`` samples per span so memory stays bounded while
+    the percentiles track current behaviour.
+    """
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.reruns = 0
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._counts = defaultdict(int)
+        self._sums = defaultdict(float)
+        self.counters = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def start_rerun(self, total="total"):
+        return RerunTimer(self, total)
+
+    def record(self, spans):
+        with self._lock:
+            self.reruns += 1
+            for name, seconds in spans.items():
+                self._samples[name].append(seconds)
+                self._counts[name] += 1
+                self._sums[name] += seconds
+
+    def increment(self, name, by=1):
+        """Bump a plain event counter, exported as dashboard_<name>_total"""
+        with self._lock:
+            self.counters[name] += by
+
+    def summary(self, quantiles=(0.5, 0.9, 0.99)):
+        """{span: {'count', 'sum', 'p50', 'p90', 'p99'}} over the recent window"""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self._samples.items()}
+            counts, sums = dict(self._counts), dict(self._sums)
+
+        result = {}
+        for name, values in samples.items():
+            row = {"count": counts[name], "sum": sums[name]}
+            for q in quantiles:
+                # Nearest-rank percentile
+                row[f"p{q * 100:g}"] = values[max(0, math.ceil(q * len(values)) - 1)]
+            result[name] = row
+        return result
+
+    def prometheus_text(self, metric="dashboard_section_seconds"):
+        """Prometheus text exposition of the span durations as a summary"""
+        lines = [
+            f"# HELP {metric} Time spent in each dashboard section per rerun.",
+            f"# TYPE {metric} summary",
+        ]
+        for name, row in sorted(self.summary().items()):
+            for q in ("0.5", "0.9", "0.99"):
+                value = row[f"p{float(q) * 100:g}"]
+                lines.append(f'{metric}{{section="{name}",quantile="{q}"}} {value:.6f}')
+            lines.append(f'{metric}_sum{{section="{name}"}} {row["sum"]:.6f}')
+            lines.append(f'{metric}_count{{section="{name}"}} {row["count"]}')
+        with self._lock:
+            counters = dict(self.counters)
+        for name, value in sorted(counters.items()):
+            lines.append(f"# TYPE dashboard_{name}_total counter")
+            lines.append(f"dashboard_{name}_total {value}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,41 @@
+import importlib
+import threading
+
+_load_lock = threading.Lock()
+
+
+class LazyModule:
+    """Stand-in for a module that imports it on first attribute access.
+
+    Unlike importlib.util.LazyLoader this is safe when several threads make
+    that first access at once (the refresher, fetch workers and script thread
+    can all race here): the real import runs once, under a lock, and nobody
+    sees a half-initialised module.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        module = self._module
+        if module is None:
+            with _load_lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                module = self._module
+        return getattr(module, attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name):
+    """Return module ``name`` without executing it until an attribute is first used.
+
+    Heavy dependencies (pandas, plotly.express, requests) are bound this way on
+    the dashboard's import path so a fresh process starts serving sooner and
+    only pays for a module when the code that needs it actually runs.
+    """
+    return LazyModule(name)
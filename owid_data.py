@@ -0,0 +1,438 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from derived_metrics import CountryYears, growth_frame
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+pa = lazy_import("pyarrow")
+ipc = lazy_import("pyarrow.ipc")
+pd = lazy_import("pandas")
+
+OWID_CSV = Path(__file__).with_name("owid-energy-data.csv")
+CACHE_DIR = Path(__file__).with_name(".cache")
+
+# Columns every projection carries so rows can still be identified
+KEY_COLUMNS = ["country", "year", "iso_code"]
+
+# Compact dtypes for the key columns; every other column is a float metric
+KEY_DTYPES = {"country": "category", "year": "int16", "iso_code": "category"}
+METRIC_DTYPE = "float32"
+
+# Metrics are float32: ~7 significant digits is plenty for shares and TWh. The
+# exception is whole-number columns (population, gdp) above 2**24, where float32
+# can no longer hold every integer and e.g. World population comes out off by hundreds
+FLOAT32_EXACT_MAX = 2 ** 24
+
+# Bump when build_arrow's layout or dtypes change, so existing files get rebuilt
+ARROW_FORMAT = 2
+
+# With sparse=True, metric columns filled in for fewer than this share of rows
+# are stored sparse; above ~50% the index overhead outweighs the NaNs saved
+SPARSE_MAX_DENSITY = 0.4
+
+# Yearly series the dashboard's insight charts are drawn from
+SUMMARY_COLUMNS = ["renewables_share_elec", "electricity_generation"]
+
+# Growth series (YoY, rolling mean, CAGR) the summary adds for these columns
+SUMMARY_GROWTH = ["renewables_share_elec", "electricity_generation"]
+
+
+def temp_path_for(path):
+    """Fresh temp file next to path, for building it and then replace()-ing it into place.
+
+    Each caller gets its own file, so replicas (or threads) building the same
+    artifact at once never write into each other's output; the last replace()
+    wins, and readers holding the old file keep their own inode.
+    """
+    fd, name = tempfile.mkstemp(dir=Path(path).parent, prefix=f".{Path(path).name}.", suffix=".tmp")
+    # mkstemp creates 0600; the published file should be readable like any other
+    os.fchmod(fd, 0o644)
+    os.close(fd)
+    return Path(name)
+
+
+def write_text_atomic(path, text):
+    tmp_path = temp_path_for(path)
+    tmp_path.write_text(text)
+    tmp_path.replace(path)
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_paths(source, cache_dir):
+    cache_dir = Path(cache_dir)
+    return cache_dir / f"{source.stem}.parquet", cache_dir / f"{source.stem}.meta.json"
+
+
+def _cache_is_valid(source, meta_path):
+    """True if the cache was built from the current version of source"""
+    if not meta_path.exists():
+        return False
+
+    meta = json.loads(meta_path.read_text())
+    stat = source.stat()
+    if meta.get("mtime") == stat.st_mtime and meta.get("size") == stat.st_size:
+        return True
+
+    # mtime changes on checkout/copy even when the content doesn't - fall back to the hash
+    if meta.get("sha256") == _file_hash(source):
+        meta.update(mtime=stat.st_mtime, size=stat.st_size)
+        write_text_atomic(meta_path, json.dumps(meta))
+        return True
+    return False
+
+
+def build_cache(source=OWID_CSV, cache_dir=CACHE_DIR, force=False):
+    """Convert the CSV to Parquet once; returns the Parquet path"""
+    source = Path(source)
+    parquet_path, meta_path = _cache_paths(source, cache_dir)
+
+    if not force and parquet_path.exists() and _cache_is_valid(source, meta_path):
+        return parquet_path
+
+    parquet_path.parent.mkdir(parents=True, exist_ok=True)
+    df = pd.read_csv(source)
+    tmp_path = temp_path_for(parquet_path)
+    df.to_parquet(tmp_path, index=False)
+    tmp_path.replace(parquet_path)
+
+    stat = source.stat()
+    write_text_atomic(meta_path, json.dumps({
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "sha256": _file_hash(source),
+    }))
+    return parquet_path
+
+
+def _metric_dtype(values):
+    """float32, except whole-number columns too large for float32 to hold exactly"""
+    values = values.to_numpy(dtype="float64")
+    values = values[np.isfinite(values)]
+    if values.size and np.abs(values).max() > FLOAT32_EXACT_MAX and np.array_equal(values, np.round(values)):
+        return "float64"
+    return METRIC_DTYPE
+
+
+def _apply_dtypes(df):
+    return df.astype({
+        column: KEY_DTYPES[column] if column in KEY_DTYPES else _metric_dtype(df[column])
+        for column in df.columns
+    })
+
+
+def _sparsify(df, max_density=SPARSE_MAX_DENSITY):
+    """Store mostly-empty metric columns as NaN-filled sparse arrays"""
+    density = df.notna().mean()
+    return df.astype({
+        column: pd.SparseDtype(df[column].dtype, np.nan)
+        for column in df.columns
+        if column not in KEY_DTYPES and density[column] < max_density
+    })
+
+
+def load_owid(columns=None, source=OWID_CSV, cache_dir=CACHE_DIR, sparse=False):
+    """Load the OWID table, reading only the key columns plus ``columns``.
+
+    The first call converts the 130-column CSV to a Parquet cache; later calls
+    read just the requested columns from it. Pass columns=None for all of them.
+    With sparse=True, columns that are mostly NaN are kept in a sparse layout.
+    """
+    parquet_path = build_cache(source, cache_dir)
+
+    if columns is not None:
+        columns = KEY_COLUMNS + [c for c in columns if c not in KEY_COLUMNS]
+
+    df = _apply_dtypes(pd.read_parquet(parquet_path, columns=columns))
+    return _sparsify(df) if sparse else df
+
+
+def build_arrow(source=OWID_CSV, cache_dir=CACHE_DIR, force=False):
+    """Write an uncompressed Arrow IPC copy of the table for memory mapping; returns its path.
+
+    Rows are sorted by (country, year) and written as a single record batch.
+    Missing metrics are stored as NaN rather than Arrow nulls, so every numeric
+    column is one plain buffer that maps straight into a NumPy array.
+    """
+    parquet_path = build_cache(source, cache_dir)
+    path = Path(cache_dir) / f"{Path(source).stem}.arrow"
+    meta_path = path.with_suffix(".arrow.json")
+    meta = {"source_mtime_ns": parquet_path.stat().st_mtime_ns, "format": ARROW_FORMAT}
+
+    if not force and path.exists() and meta_path.exists() and json.loads(meta_path.read_text()) == meta:
+        return path
+
+    df = _apply_dtypes(pd.read_parquet(parquet_path))
+    df = df.sort_values(["country", "year"], kind="stable").reset_index(drop=True)
+
+    arrays = []
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = values.cat.codes.to_numpy()
+            indices = pa.array(codes, mask=codes < 0)
+            arrays.append(pa.DictionaryArray.from_arrays(indices, pa.array(values.cat.categories.astype(str))))
+        else:
+            arrays.append(pa.array(values.to_numpy(), from_pandas=False))
+    table = pa.Table.from_arrays(arrays, names=list(df.columns))
+
+    tmp_path = temp_path_for(path)
+    with pa.OSFile(str(tmp_path), "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table, max_chunksize=max(len(df), 1))
+    tmp_path.replace(path)
+    write_text_atomic(meta_path, json.dumps(meta))
+    return path
+
+
+class MappedOwid:
+    """Read-only memory map of the Arrow IPC copy of the OWID table.
+
+    Every process that opens the same file shares one copy in the OS page
+    cache; opening it only reads the schema, and data pages are faulted in as
+    columns are touched.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._source = pa.memory_map(str(self.path), "r")
+        self.table = ipc.open_file(self._source).read_all()
+
+    @property
+    def columns(self):
+        return self.table.column_names
+
+    def column(self, name):
+        """Zero-copy, read-only NumPy view of a numeric column"""
+        return self.table.column(name).chunk(0).to_numpy(zero_copy_only=True)
+
+    def frame(self, columns=None):
+        """DataFrame of the key columns plus ``columns`` (all if None).
+
+        Numeric columns are the mapped buffers themselves, not copies; the
+        country/iso_code categoricals only copy their small code arrays.
+        """
+        names = self.columns if columns is None else KEY_COLUMNS + [c for c in columns if c not in KEY_COLUMNS]
+        data = {}
+        for name in names:
+            chunk = self.table.column(name).chunk(0)
+            if pa.types.is_dictionary(chunk.type):
+                codes = chunk.indices.fill_null(-1).to_numpy()
+                data[name] = pd.Categorical.from_codes(codes, chunk.dictionary.to_pylist())
+            else:
+                data[name] = chunk.to_numpy(zero_copy_only=True)
+        return pd.DataFrame(data, copy=False)
+
+
+def open_mapped(source=OWID_CSV, cache_dir=CACHE_DIR):
+    """Map the Arrow copy of the table, converting it first if it is missing or stale"""
+    return MappedOwid(build_arrow(source, cache_dir))
+
+
+def dataset_version(source=OWID_CSV, cache_dir=CACHE_DIR):
+    """Token that changes whenever the mapped Arrow copy is rebuilt, for keying caches"""
+    return build_arrow(source, cache_dir).stat().st_mtime_ns
+
+
+def _sorted_by_country_year(df):
+    countries = df["country"]
+    countries = countries.cat.codes.to_numpy() if isinstance(countries.dtype, pd.CategoricalDtype) else countries.to_numpy()
+    years = df["year"].to_numpy()
+    return bool(np.all(
+        (countries[1:] > countries[:-1]) | ((countries[1:] == countries[:-1]) & (years[1:] >= years[:-1]))
+    ))
+
+
+class OwidIndex:
+    """Country/year offset table over the OWID frame.
+
+    The frame is sorted by (country, year) once; each country then maps to a
+    contiguous row range, and years within it are found by binary search, so
+    slicing never scans the whole table.
+    """
+
+    def __init__(self, df):
+        # Already-sorted input (e.g. a MappedOwid frame) is used as is, without a copy
+        if not _sorted_by_country_year(df):
+            df = df.sort_values(["country", "year"], kind="stable").reset_index(drop=True)
+        self.df = df
+        self._years = df["year"].to_numpy()
+
+        countries = df["country"].astype(str).to_numpy()
+        starts = np.flatnonzero(np.r_[True, countries[1:] != countries[:-1]])
+        stops = np.r_[starts[1:], len(df)]
+        self.offsets = dict(zip(countries[starts], zip(starts.tolist(), stops.tolist())))
+
+    @property
+    def countries(self):
+        return list(self.offsets)
+
+    def _bounds(self, country, year_range=None):
+        start, stop = self.offsets.get(country, (0, 0))
+        if year_range is not None and start < stop:
+            years = self._years[start:stop]
+            first, last = year_range
+            stop = start + int(np.searchsorted(years, last, side="right"))
+            start = start + int(np.searchsorted(years, first, side="left"))
+        return start, stop
+
+    def get_series(self, country, columns=None, year_range=None):
+        """Rows for one country, optionally limited to columns and an inclusive year range"""
+        start, stop = self._bounds(country, year_range)
+        rows = self.df.iloc[start:stop]
+        if columns is not None:
+            rows = rows[["country", "year"] + [c for c in columns if c not in ("country", "year")]]
+        return rows
+
+    def get_many(self, countries, columns=None, year_range=None):
+        """Concatenated rows for several countries"""
+        return pd.concat(
+            [self.get_series(country, columns, year_range) for country in countries]
+        )
+
+
+class CountrySummary:
+    """Dense per-country yearly arrays for a few metrics.
+
+    Built once from the Parquet cache into a (country, year, metric) float32
+    block, so a lookup for any country and year range is a dict hit plus an
+    array slice, whatever the size of the OWID table.
+    """
+
+    def __init__(self, df, columns=SUMMARY_COLUMNS):
+        self.columns = list(columns)
+        self.first_year = int(df["year"].min())
+        self.last_year = int(df["year"].max())
+
+        codes, countries = pd.factorize(df["country"].astype(str))
+        self._rows = {country: i for i, country in enumerate(countries)}
+        self._values = np.full(
+            (len(countries), self.last_year - self.first_year + 1, len(self.columns)), np.nan, dtype="float32"
+        )
+        self._values[codes, df["year"].to_numpy() - self.first_year] = df[self.columns].to_numpy(dtype="float32")
+
+    @classmethod
+    def load(cls, columns=SUMMARY_COLUMNS, growth=SUMMARY_GROWTH, source=OWID_CSV, cache_dir=CACHE_DIR):
+        """Summary of columns plus growth_frame() series for each column in growth"""
+        df = open_mapped(source, cache_dir).frame(columns)
+        grid = CountryYears(df["country"], df["year"])
+        df = pd.concat([df] + [growth_frame(df, column, country_years=grid) for column in growth], axis=1)
+        return cls(df, [c for c in df.columns if c not in KEY_COLUMNS])
+
+    @property
+    def countries(self):
+        return list(self._rows)
+
+    def series(self, country, year_range=None):
+        """{'year': (...), metric: (...)} for one country, skipping years with no data.
+
+        Values are tuples so they can be passed straight to cached figure builders.
+        """
+        first, last = year_range or (self.first_year, self.last_year)
+        first, last = max(first, self.first_year), min(last, self.last_year)
+        row = self._rows.get(country)
+        if row is None or first > last:
+            return {"year": (), **{column: () for column in self.columns}}
+
+        block = self._values[row, first - self.first_year:last - self.first_year + 1]
+        keep = ~np.isnan(block).all(axis=1)
+        result = {"year": tuple((first + np.flatnonzero(keep)).tolist())}
+        for i, column in enumerate(self.columns):
+            result[column] = tuple(np.round(block[keep, i].astype("float64"), 2).tolist())
+        return result
+
+
+def lookup_benchmark(index, counts=(1, 10, 50, 200), repeat=5, year_range=(2015, 2024)):
+    """Seconds per query for boolean-mask filtering vs the index, by number of countries"""
+    df = index.df
+    results = []
+    for n in counts:
+        countries = index.countries[:n]
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for country in countries:
+                df[(df["country"] == country) & (df["year"].between(*year_range))]
+        scan_seconds = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for country in countries:
+                index.get_series(country, year_range=year_range)
+        index_seconds = (time.perf_counter() - start) / repeat
+
+        results.append({"countries": n, "scan_seconds": scan_seconds, "index_seconds": index_seconds})
+    return results
+
+
+def load_report(columns, source=OWID_CSV, cache_dir=CACHE_DIR):
+    """Load time and in-memory size of the raw CSV path vs the cached projection"""
+    start = time.perf_counter()
+    raw = pd.read_csv(source)
+    csv_seconds = time.perf_counter() - start
+
+    build_cache(source, cache_dir)
+    start = time.perf_counter()
+    projected = load_owid(columns, source, cache_dir)
+    cache_seconds = time.perf_counter() - start
+
+    return {
+        "csv_seconds": csv_seconds,
+        "csv_bytes": int(raw.memory_usage(deep=True).sum()),
+        "cache_seconds": cache_seconds,
+        "cache_bytes": int(projected.memory_usage(deep=True).sum()),
+    }
+
+
+def memory_report(source=OWID_CSV, cache_dir=CACHE_DIR):
+    """In-memory bytes of the full table as plain float64, compact dtypes, and compact + sparse"""
+    dense = pd.read_parquet(build_cache(source, cache_dir))
+    compact = load_owid(source=source, cache_dir=cache_dir)
+    sparse = load_owid(source=source, cache_dir=cache_dir, sparse=True)
+    return {
+        "float64_bytes": int(dense.memory_usage(deep=True).sum()),
+        "compact_bytes": int(compact.memory_usage(deep=True).sum()),
+        "sparse_bytes": int(sparse.memory_usage(deep=True).sum()),
+        "sparse_columns": sum(isinstance(dtype, pd.SparseDtype) for dtype in sparse.dtypes),
+        "float64_columns": sum(dtype == "float64" for dtype in compact.dtypes),
+    }
+
+
+if __name__ == "__main__":
+    notebook_columns = [
+        "population", "primary_energy_consumption", "electricity_generation",
+        "renewables_electricity", "fossil_electricity",
+    ]
+    report = load_report(notebook_columns)
+    print(f"CSV:     {report['csv_seconds'] * 1000:7.1f} ms  {report['csv_bytes'] / 1e6:6.1f} MB")
+    print(f"Parquet: {report['cache_seconds'] * 1000:7.1f} ms  {report['cache_bytes'] / 1e6:6.1f} MB")
+
+    print()
+    memory = memory_report()
+    print(f"Full table, float64:         {memory['float64_bytes'] / 1e6:6.1f} MB")
+    print(f"float32 + categoricals:      {memory['compact_bytes'] / 1e6:6.1f} MB "
+          f"({1 - memory['compact_bytes'] / memory['float64_bytes']:.0%} smaller, "
+          f"{memory['float64_columns']} columns kept float64)")
+    print(f"... + {memory['sparse_columns']:3d} sparse columns:   {memory['sparse_bytes'] / 1e6:6.1f} MB "
+          f"({1 - memory['sparse_bytes'] / memory['float64_bytes']:.0%} smaller)")
+
+    start = time.perf_counter()
+    mapped = open_mapped()
+    full = mapped.frame()
+    print(f"Memory-mapped Arrow: {(time.perf_counter() - start) * 1000:.1f} ms to open all {full.shape[1]} columns "
+          f"({mapped.path.stat().st_size / 1e6:.1f} MB file, shared between processes)")
+
+    print()
+    print("countries   mask scan    index")
+    for row in lookup_benchmark(OwidIndex(load_owid(notebook_columns))):
+        print(f"{row['countries']:9d}  {row['scan_seconds'] * 1000:8.2f} ms  {row['index_seconds'] * 1000:6.2f} ms")
@@ -0,0 +1,95 @@
+import streamlit as st
+import plotly.express as px
+
+from derived_metrics import METRICS, MetricEngine
+from owid_data import KEY_COLUMNS, OwidIndex, dataset_version, open_mapped
+
+st.set_page_config(
+    page_title="OWID Energy Explorer",
+    page_icon="⚡",
+    layout="wide"
+)
+
+DEFAULT_COUNTRIES = ["Kenya", "Uganda", "Tanzania", "Ethiopia"]
+DEFAULT_METRICS = ["renewables_share_elec", "electricity_generation"]
+
+@st.cache_resource(max_entries=1)
+def get_owid_index(version):
+    """Full OWID table for one dataset version, mapped once per process and shared by every session"""
+    # Replicas on one host share the mapped file through the page cache instead of each parsing a copy
+    return OwidIndex(open_mapped().frame())
+
+@st.cache_resource
+def get_metric_engine():
+    """Derived metrics, each computed once and then memoized across dataset versions"""
+    return MetricEngine(get_owid_index(dataset_version()).df)
+
+def current_engine(version):
+    """The shared engine pointed at this dataset version's table"""
+    engine, df = get_metric_engine(), get_owid_index(version).df
+    if engine.df is not df:
+        # Keeps the memoized metrics whose inputs are unchanged in the new version
+        engine.set_data(df)
+    return engine
+
+# Keyed on user selections (countries x metrics x years), so keep only the most recent ones
+@st.cache_data(max_entries=64)
+def selection_frame(version, countries, metrics, year_range):
+    """Long-format chart data for one selection (arguments are tuples so they hash)"""
+    columns = [m for m in metrics if m not in METRICS]
+    rows = get_owid_index(version).get_many(countries, columns, year_range)
+    # Derived metrics are full-table Series aligned with the index's rows
+    engine = current_engine(version)
+    rows = rows.assign(**{m: engine.get(m).loc[rows.index] for m in metrics if m in METRICS})
+    return rows.melt(id_vars=["country", "year"], var_name="metric", value_name="value").dropna()
+
+st.title("OWID Energy Explorer")
+st.markdown("*Compare any countries and metrics from Our World in Data's energy dataset*")
+
+version = dataset_version()
+owid = get_owid_index(version)
+metric_options = [c for c in owid.df.columns if c not in KEY_COLUMNS] + list(METRICS)
+min_year, max_year = int(owid.df["year"].min()), int(owid.df["year"].max())
+
+col1, col2 = st.columns(2)
+
+with col1:
+    countries = st.multiselect(
+        "Countries",
+        owid.countries,
+        default=[c for c in DEFAULT_COUNTRIES if c in owid.offsets]
+    )
+
+with col2:
+    metrics = st.multiselect("Metrics", metric_options, default=DEFAULT_METRICS)
+
+year_range = st.slider("Years", min_year, max_year, (2000, max_year))
+
+if not countries or not metrics:
+    st.info("Pick at least one country and one metric.")
+    st.stop()
+
+chart_df = selection_frame(version, tuple(countries), tuple(metrics), year_range)
+
+for metric in metrics:
+    metric_df = chart_df[chart_df["metric"] == metric]
+    if metric_df.empty:
+        st.caption(f"No {metric} data for this selection.")
+        continue
+
+    fig = px.line(
+        metric_df,
+        x="year",
+        y="value",
+        color="country",
+        title=METRICS[metric].description if metric in METRICS else metric.replace("_", " ").capitalize(),
+        markers=True
+    )
+    fig.update_layout(yaxis_title=metric, xaxis_title="Year")
+    st.plotly_chart(fig, use_container_width=True)
+
+with st.expander("Data"):
+    st.dataframe(
+        chart_df.pivot_table(index=["country", "year"], columns="metric", values="value", observed=True),
+        use_container_width=True
+    )
@@ -0,0 +1,164 @@
+import threading
+import time
+
+
+class TTLCache:
+    """Process-wide cache of live power data, keyed on zone.
+
+    Entries live for ``ttl`` seconds (``negative_ttl`` when the loader came
+    back empty). Concurrent misses on the same key are collapsed so only one
+    caller hits the upstream API while the others wait for its result.
+    """
+
+    def __init__(self, ttl=300, negative_ttl=30):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = {}      # key -> (value, fetched_at)
+        self._inflight = {}     # key -> threading.Event
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _is_fresh(self, value, fetched_at, now):
+        ttl = self.ttl if value is not None else self.negative_ttl
+        return now - fetched_at < ttl
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                entry = self._entries.get(key)
+                if entry is not None and self._is_fresh(entry[0], entry[1], now):
+                    self.hits += 1
+                    return entry[0]
+
+                event = self._inflight.get(key)
+                if event is None:
+                    # We are the leader for this key
+                    self.misses += 1
+                    event = threading.Event()
+                    self._inflight[key] = event
+                    break
+
+            # Someone else is already fetching this key - wait and re-check
+            event.wait()
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and self._inflight.get(key) is None:
+                    self.hits += 1
+                    return entry[0]
+
+        try:
+            value = loader()
+        except Exception:
+            value = None
+            raise
+        finally:
+            with self._lock:
+                self._entries[key] = (value, time.monotonic())
+                del self._inflight[key]
+            event.set()
+
+        return value
+
+    def age(self, key):
+        """Seconds since key was last fetched, or None if never fetched"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return time.monotonic() - entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+            }
+
+
+class Snapshot:
+    """A parsed power breakdown and when it was fetched"""
+
+    def __init__(self, data, fetched_at):
+        self.data = data
+        self.fetched_at = fetched_at
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+
+class SnapshotRefresher:
+    """Polls fetch() on a background thread and keeps the last good result.
+
+    Readers call latest(), which never blocks: it returns whatever snapshot
+    was swapped in most recently, however old, while the thread keeps trying
+    to replace it. Failed polls leave the previous snapshot in place and are
+    retried after retry_interval, doubling on each further failure up to
+    interval; the first success goes back to polling every interval.
+    on_update, if given, is called with each new payload.
+    """
+
+    def __init__(self, fetch, interval=300, on_update=None, retry_interval=30):
+        self.fetch = fetch
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.on_update = on_update
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+        self._snapshot = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="power-refresher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def latest(self):
+        return self._snapshot
+
+    def refresh(self):
+        """Run one poll now; returns True if a new snapshot was swapped in"""
+        try:
+            data = self.fetch()
+        except Exception as e:
+            data = None
+            self.last_error = str(e)
+
+        if data is None:
+            self.failures += 1
+            self.consecutive_failures += 1
+            return False
+        self.consecutive_failures = 0
+
+        # Single attribute assignment, so readers see either the old or the new snapshot
+        self._snapshot = Snapshot(data, time.time())
+
+        if self.on_update is not None:
+            try:
+                self.on_update(data)
+            except Exception as e:
+                self.last_error = str(e)
+        return True
+
+    def next_wait(self):
+        """Seconds until the next poll: interval after a success, a growing retry delay after failures"""
+        if self.consecutive_failures == 0:
+            return self.interval
+        return min(self.interval, self.retry_interval * 2 ** (self.consecutive_failures - 1))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.next_wait())
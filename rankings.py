@@ -0,0 +1,156 @@
+"""Per-year country rankings over OWID metrics.
+
+    python rankings.py
+
+Each metric is sorted once, by (year, value), with a single lexsort. After
+that a top-N list is a slice, a country's rank is a binary search within its
+year, and the value at a percentile is one index lookup; nothing re-sorts the
+table per query.
+"""
+import time
+
+from lazy_imports import lazy_import
+from owid_data import CACHE_DIR, OWID_CSV, open_mapped
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Metric -> label for the leaderboard
+RANK_METRICS = {
+    "renewables_share_elec": "Renewable share of electricity (%)",
+    "low_carbon_share_elec": "Low-carbon share of electricity (%)",
+    "per_capita_electricity": "Electricity generation per person (kWh)",
+    "electricity_generation": "Electricity generation (TWh)",
+    "carbon_intensity_elec": "Carbon intensity of electricity (gCO2/kWh)",
+}
+
+# Metrics where the smallest value ranks first
+LOWER_IS_BETTER = {"carbon_intensity_elec"}
+
+
+class _Ranking:
+    """One metric's countries ordered best-first within each year"""
+
+    def __init__(self, countries, years, values, lower_is_better):
+        valid = ~np.isnan(values)
+        countries, years, values = countries[valid], years[valid], values[valid]
+
+        # Best-first within a year: sort on a "score" that is smaller for better values
+        scores = values if lower_is_better else -values
+        order = np.lexsort((scores, years))
+        self.countries = countries[order]
+        self.values = values[order]
+        self.scores = scores[order]
+
+        sorted_years = years[order]
+        starts = np.flatnonzero(np.r_[True, sorted_years[1:] != sorted_years[:-1]])
+        stops = np.r_[starts[1:], len(order)]
+        self.bounds = dict(zip(sorted_years[starts].tolist(), zip(starts.tolist(), stops.tolist())))
+        # (country, year) -> score, for O(1) lookup before the binary search
+        self.score_of = dict(zip(zip(self.countries.tolist(), sorted_years.tolist()), self.scores.tolist()))
+
+
+class RankIndex:
+    """Precomputed per-year, per-metric rankings of countries (OWID aggregate rows excluded)"""
+
+    def __init__(self, df, metrics=RANK_METRICS):
+        df = df[df["iso_code"].notna()]
+        countries = df["country"].astype(str).to_numpy()
+        years = df["year"].to_numpy()
+        self.rankings = {
+            metric: _Ranking(countries, years, df[metric].to_numpy(dtype="float64"), metric in LOWER_IS_BETTER)
+            for metric in metrics
+        }
+
+    @classmethod
+    def load(cls, metrics=RANK_METRICS, source=OWID_CSV, cache_dir=CACHE_DIR):
+        return cls(open_mapped(source, cache_dir).frame(list(metrics)), metrics)
+
+    def years(self, metric):
+        return sorted(self.rankings[metric].bounds)
+
+    def count(self, metric, year):
+        """Number of countries with a value for metric in year"""
+        start, stop = self.rankings[metric].bounds.get(year, (0, 0))
+        return stop - start
+
+    def latest_year(self, metric, min_coverage=0.8):
+        """Latest year in which at least min_coverage of the best-covered year's countries report"""
+        counts = {year: stop - start for year, (start, stop) in self.rankings[metric].bounds.items()}
+        needed = max(counts.values(), default=0) * min_coverage
+        return max((year for year, n in counts.items() if n >= needed), default=None)
+
+    def top(self, metric, year, n=10):
+        """Best n countries as a DataFrame with Rank, Country and Value"""
+        ranking = self.rankings[metric]
+        start, stop = ranking.bounds.get(year, (0, 0))
+        shown = min(stop, start + n)
+        # Tied values share the best rank, as in rank()
+        ranks = np.searchsorted(ranking.scores[start:stop], ranking.scores[start:shown], side="left") + 1
+        return pd.DataFrame({
+            "Rank": ranks,
+            "Country": ranking.countries[start:shown],
+            "Value": ranking.values[start:shown],
+        })
+
+    def rank(self, metric, year, country):
+        """(rank, total) for a country, ties sharing the best rank; None if it has no value"""
+        ranking = self.rankings[metric]
+        score = ranking.score_of.get((country, year))
+        if score is None:
+            return None
+        start, stop = ranking.bounds[year]
+        position = np.searchsorted(ranking.scores[start:stop], score, side="left")
+        return int(position) + 1, stop - start
+
+    def percentile(self, metric, year, country):
+        """Share of other countries this one ranks ahead of or level with (100 = first)"""
+        result = self.rank(metric, year, country)
+        if result is None:
+            return None
+        rank, total = result
+        return 100.0 if total == 1 else (total - rank) / (total - 1) * 100
+
+    def value_at_percentile(self, metric, year, percentile):
+        """Value of the country at a percentile of the ranking (100 = best, 0 = worst)"""
+        ranking = self.rankings[metric]
+        start, stop = ranking.bounds.get(year, (0, 0))
+        if start == stop:
+            return None
+        position = round((100 - percentile) / 100 * (stop - start - 1))
+        return float(ranking.values[start + position])
+
+
+def rank_benchmark(index, df, metric="renewables_share_elec", country="Kenya", repeat=200):
+    """Seconds per rank-of-country query: sorting the frame each time vs the precomputed index"""
+    countries_only = df[df["iso_code"].notna()]
+    year = index.latest_year(metric)
+    ascending = metric in LOWER_IS_BETTER
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        ranked = countries_only[countries_only["year"] == year].dropna(subset=[metric])
+        ranked = ranked.sort_values(metric, ascending=ascending).reset_index(drop=True)
+        sort_rank = int(ranked.index[ranked["country"] == country][0]) + 1
+    sort_seconds = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        index_rank = index.rank(metric, year, country)[0]
+    index_seconds = (time.perf_counter() - start) / repeat
+
+    return {"year": year, "sort_seconds": sort_seconds, "index_seconds": index_seconds,
+            "sort_rank": sort_rank, "index_rank": index_rank}
+
+
+if __name__ == "__main__":
+    df = open_mapped().frame(list(RANK_METRICS))
+    start = time.perf_counter()
+    index = RankIndex(df)
+    print(f"Built rankings for {len(RANK_METRICS)} metrics in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    result = rank_benchmark(index, df)
+    print(f"Kenya's renewable share rank in {result['year']}: #{result['index_rank']} "
+          f"(sort each time: #{result['sort_rank']})")
+    print(f"  sort each time: {result['sort_seconds'] * 1e6:8.1f} us/query")
+    print(f"  rank index:     {result['index_seconds'] * 1e6:8.1f} us/query")
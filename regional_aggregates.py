@@ -0,0 +1,137 @@
+"""Generation-weighted regional electricity aggregates from the OWID dataset.
+
+    python regional_aggregates.py
+
+Sums each region's member countries per year with one grouped pass and
+persists the result next to the Parquet cache, so the dashboard looks up a
+region/year instead of re-aggregating ~22k rows on every rerun.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+from lazy_imports import lazy_import
+from owid_data import CACHE_DIR, OWID_CSV, build_cache, load_owid, temp_path_for, write_text_atomic
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# Region -> ISO 3166 alpha-3 members; None means every country in the dataset
+REGIONS = {
+    "East Africa": [
+        # East African Community
+        "BDI", "COD", "KEN", "RWA", "SOM", "SSD", "TZA", "UGA",
+    ],
+    "Sub-Saharan Africa": [
+        "AGO", "BEN", "BWA", "BFA", "BDI", "CPV", "CMR", "CAF", "TCD", "COM", "COD", "COG",
+        "CIV", "GNQ", "ERI", "SWZ", "ETH", "GAB", "GMB", "GHA", "GIN", "GNB", "KEN", "LSO",
+        "LBR", "MDG", "MWI", "MLI", "MRT", "MUS", "MOZ", "NAM", "NER", "NGA", "RWA", "STP",
+        "SEN", "SYC", "SLE", "SOM", "ZAF", "SSD", "SDN", "TZA", "TGO", "UGA", "ZMB", "ZWE",
+    ],
+    "World": None,
+}
+
+INPUT_COLUMNS = ["population", "electricity_generation", "renewables_electricity"]
+
+
+def _regions_digest():
+    return hashlib.sha256(json.dumps(REGIONS, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def compute_aggregates(df):
+    """(region, year) rows with member count, population, generation and weighted renewable share.
+
+    The renewable share is renewables / generation summed over countries that
+    report both, i.e. each country weighted by how much electricity it makes.
+    """
+    # Countries only: OWID's own aggregates (World, Africa (EI), ...) have no ISO code
+    df = df[df["iso_code"].notna()]
+    iso = df["iso_code"].astype(str).to_numpy()
+
+    # One long frame with a row per (region, member country-year), then a single groupby
+    parts = []
+    for region, members in REGIONS.items():
+        mask = np.ones(len(df), dtype=bool) if members is None else np.isin(iso, members)
+        parts.append(df.loc[mask, ["year"] + INPUT_COLUMNS].assign(region=region))
+    long = pd.concat(parts, ignore_index=True)
+
+    reported = long["electricity_generation"].notna() & long["renewables_electricity"].notna()
+    long["weighted_generation"] = long["electricity_generation"].where(reported)
+    long["weighted_renewables"] = long["renewables_electricity"].where(reported)
+    long["countries"] = reported.astype("int16")
+
+    grouped = long.groupby(["region", "year"], sort=True).agg(
+        countries=("countries", "sum"),
+        population=("population", "sum"),
+        generation_twh=("weighted_generation", "sum"),
+        renewables_twh=("weighted_renewables", "sum"),
+    )
+    grouped["renewable_share"] = (grouped["renewables_twh"] / grouped["generation_twh"] * 100).where(
+        grouped["generation_twh"] > 0
+    )
+    return grouped.reset_index().astype({"year": "int16"})
+
+
+def _artifact_paths(source, cache_dir):
+    cache_dir = Path(cache_dir)
+    return cache_dir / f"{Path(source).stem}.regions.parquet", cache_dir / f"{Path(source).stem}.regions.json"
+
+
+def build_aggregates(source=OWID_CSV, cache_dir=CACHE_DIR, force=False):
+    """Write the aggregates artifact if the data or REGIONS changed; returns its path"""
+    parquet_cache = build_cache(source, cache_dir)
+    path, meta_path = _artifact_paths(source, cache_dir)
+    meta = {"source_mtime_ns": parquet_cache.stat().st_mtime_ns, "regions": _regions_digest()}
+
+    if not force and path.exists() and meta_path.exists() and json.loads(meta_path.read_text()) == meta:
+        return path
+
+    aggregates = compute_aggregates(load_owid(INPUT_COLUMNS, source, cache_dir))
+    tmp_path = temp_path_for(path)
+    aggregates.to_parquet(tmp_path, index=False)
+    tmp_path.replace(path)
+    write_text_atomic(meta_path, json.dumps(meta))
+    return path
+
+
+class RegionalAggregates:
+    """In-memory (region, year) lookup over the persisted aggregates"""
+
+    def __init__(self, df):
+        self.df = df
+        self._rows = {
+            (region, int(year)): row
+            for region, year, row in zip(df["region"], df["year"], df.to_dict("records"))
+        }
+        # Most countries any year of a region has reported, for coverage checks
+        self._max_countries = df.groupby("region")["countries"].max().to_dict()
+
+    @classmethod
+    def load(cls, source=OWID_CSV, cache_dir=CACHE_DIR):
+        return cls(pd.read_parquet(build_aggregates(source, cache_dir)))
+
+    @property
+    def regions(self):
+        return list(self._max_countries)
+
+    def get(self, region, year):
+        """Aggregate row for a region and year as a dict, None if there isn't one"""
+        return self._rows.get((region, int(year)))
+
+    def latest_year(self, region, min_coverage=0.8):
+        """Latest year in which at least min_coverage of the region's countries reported"""
+        needed = self._max_countries.get(region, 0) * min_coverage
+        years = self.df.loc[
+            (self.df["region"] == region) & (self.df["countries"] >= needed) & self.df["renewable_share"].notna(),
+            "year"
+        ]
+        return int(years.max()) if not years.empty else None
+
+
+if __name__ == "__main__":
+    aggregates = RegionalAggregates.load()
+    for region in aggregates.regions:
+        year = aggregates.latest_year(region)
+        row = aggregates.get(region, year)
+        print(f"{region:20s} {year}  {row['renewable_share']:5.1f}% renewable  "
+              f"{row['generation_twh']:9.1f} TWh  {row['countries']} countries")
@@ -0,0 +1,97 @@
+from electricity_maps import RENEWABLE_KEYS
+from lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+# Rollup resolutions, finest first: name -> (bucket width in seconds, SQL bucket expression)
+RESOLUTIONS = {
+    "hour": (3600, "ts - ts % 3600"),
+    "day": (86400, "ts - ts % 86400"),
+    "month": (31 * 86400, "CAST(strftime('%s', ts, 'unixepoch', 'start of month') AS INTEGER)"),
+}
+
+RESOLUTION_LABELS = {
+    "raw": "every snapshot",
+    "hour": "hourly averages",
+    "day": "daily averages",
+    "month": "monthly averages",
+}
+
+# Assumed spacing of raw snapshots, used only when choosing a resolution
+RAW_INTERVAL = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup (
+    zone       TEXT    NOT NULL,
+    resolution TEXT    NOT NULL,
+    bucket     INTEGER NOT NULL,   -- bucket start, epoch seconds UTC
+    source     TEXT    NOT NULL,
+    n          INTEGER NOT NULL,
+    total      REAL    NOT NULL,
+    min_mw     REAL,
+    max_mw     REAL,
+    PRIMARY KEY (zone, resolution, bucket, source)
+) WITHOUT ROWID
+"""
+
+
+def create_rollup_tables(conn):
+    conn.execute(SCHEMA)
+
+
+def update_rollups(conn, staging_table):
+    """Fold newly inserted rows from staging_table into every rollup resolution.
+
+    Only rows that were actually new should be in staging_table, otherwise
+    duplicates would be counted twice.
+    """
+    for resolution, (_, bucket_expr) in RESOLUTIONS.items():
+        conn.execute(f"""
+            INSERT INTO rollup (zone, resolution, bucket, source, n, total, min_mw, max_mw)
+            SELECT zone, '{resolution}', {bucket_expr} AS bucket, source,
+                   COUNT(mw), SUM(mw), MIN(mw), MAX(mw)
+            FROM {staging_table}
+            WHERE mw IS NOT NULL
+            GROUP BY zone, bucket, source
+            ON CONFLICT (zone, resolution, bucket, source) DO UPDATE SET
+                n = n + excluded.n,
+                total = total + excluded.total,
+                min_mw = MIN(min_mw, excluded.min_mw),
+                max_mw = MAX(max_mw, excluded.max_mw)
+        """)
+
+
+def pick_resolution(start, end, width_px):
+    """Coarsest detail the chart needs: the finest level with no more points than pixels"""
+    span = max(end - start, 1)
+    if span / RAW_INTERVAL <= width_px:
+        return "raw"
+    for resolution, (seconds, _) in RESOLUTIONS.items():
+        if span / seconds <= width_px:
+            return resolution
+    return "month"
+
+
+def query_rollup(conn, zone, resolution, start, end):
+    """Per-source mean/min/max for each bucket in [start, end], plus renewable share"""
+    df = pd.read_sql_query(
+        """
+        SELECT bucket AS ts, source, total / n AS mw, min_mw, max_mw
+        FROM rollup
+        WHERE zone = ? AND resolution = ? AND bucket BETWEEN ? AND ?
+        ORDER BY bucket
+        """,
+        conn,
+        params=(zone, resolution, int(start), int(end))
+    )
+    return add_renewable_share(df)
+
+
+def add_renewable_share(df):
+    """Add a renewable_share column: renewable MW / total MW within each timestamp"""
+    positive = df["mw"].clip(lower=0)
+    renewable = positive.where(df["source"].isin(RENEWABLE_KEYS), 0)
+    totals = positive.groupby(df["ts"]).transform("sum")
+    renewables = renewable.groupby(df["ts"]).transform("sum")
+    df["renewable_share"] = (renewables / totals * 100).where(totals > 0)
+    return df
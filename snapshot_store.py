@@ -0,0 +1,183 @@
+import atexit
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from lazy_imports import lazy_import
+from rollups import (
+    RESOLUTIONS, add_renewable_share, create_rollup_tables, pick_resolution, query_rollup, update_rollups
+)
+
+pd = lazy_import("pandas")
+
+DEFAULT_DB = Path(__file__).with_name("history") / "power_snapshots.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS generation (
+    zone   TEXT    NOT NULL,
+    ts     INTEGER NOT NULL,   -- upstream datetime, epoch seconds UTC
+    source TEXT    NOT NULL,   -- upstream breakdown key, e.g. 'geothermal'
+    mw     REAL,
+    PRIMARY KEY (zone, ts, source)
+) WITHOUT ROWID
+"""
+
+STAGING = """
+CREATE TEMP TABLE IF NOT EXISTS staging (
+    zone TEXT, ts INTEGER, source TEXT, mw REAL,
+    PRIMARY KEY (zone, ts, source)
+)
+"""
+
+
+def parse_timestamp(value):
+    """Epoch seconds for an Electricity Maps ISO datetime such as 2024-05-01T12:00:00.000Z"""
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+class SnapshotStore:
+    """Append-only SQLite store of live generation snapshots.
+
+    Rows are keyed on (zone, upstream datetime, source), so re-adding a
+    snapshot we've already seen is a no-op. Writes are buffered and flushed
+    in one transaction once batch_size snapshots are waiting, once the oldest
+    queued row is max_age seconds old, before any read so queries always see
+    what was added, and at interpreter exit. Each flush also folds the new
+    rows into the hourly/daily/monthly rollups. A flush that fails (e.g.
+    another replica holding the write lock) puts its rows back in the queue.
+    """
+
+    def __init__(self, path, batch_size=12, max_age=600):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.last_error = None
+        self._pending = []
+        self._oldest_pending = None   # time.monotonic() when the oldest queued row was added
+        self._closed = False
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        self._conn.execute(STAGING)
+        create_rollup_tables(self._conn)
+        self._conn.commit()
+        # Replicas get restarted; don't lose what's still queued when they are
+        atexit.register(self.close)
+
+    def add(self, zone, payload):
+        """Queue one power breakdown payload; returns the number of rows queued"""
+        if not payload or not payload.get("datetime"):
+            return 0
+
+        ts = parse_timestamp(payload["datetime"])
+        rows = [
+            (zone, ts, source, value)
+            for source, value in (payload.get("powerProductionBreakdown") or {}).items()
+            if value is not None
+        ]
+
+        with self._lock:
+            if rows and not self._pending:
+                self._oldest_pending = time.monotonic()
+            self._pending.extend(rows)
+            pending_snapshots = len({(r[0], r[1]) for r in self._pending})
+            too_old = self._pending and time.monotonic() - self._oldest_pending >= self.max_age
+        if pending_snapshots >= self.batch_size or too_old:
+            self.flush()
+        return len(rows)
+
+    def flush(self):
+        """Write every queued row, and its rollups, in a single transaction.
+
+        If the transaction fails the rows go back to the front of the queue
+        for the next flush, and the error is re-raised.
+        """
+        with self._lock:
+            rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+            try:
+                with self._conn:
+                    # Stage the batch and drop rows we already have, so rollups only see new data
+                    self._conn.execute("DELETE FROM staging")
+                    self._conn.executemany("INSERT OR IGNORE INTO staging VALUES (?, ?, ?, ?)", rows)
+                    self._conn.execute("""
+                        DELETE FROM staging WHERE EXISTS (
+                            SELECT 1 FROM generation g
+                            WHERE g.zone = staging.zone AND g.ts = staging.ts AND g.source = staging.source
+                        )
+                    """)
+                    self._conn.execute("INSERT INTO generation SELECT * FROM staging")
+                    update_rollups(self._conn, "staging")
+            except sqlite3.Error as e:
+                self._pending = rows + self._pending
+                self.last_error = str(e)
+                raise
+            self._oldest_pending = None
+        return len(rows)
+
+    def _flush_for_read(self):
+        """flush() before a query; on failure the rows stay queued and the query shows what's committed"""
+        try:
+            self.flush()
+        except sqlite3.Error:
+            pass
+
+    def query(self, zone, start=None, end=None):
+        """Rows for a zone between start and end (epoch seconds, inclusive) as a DataFrame"""
+        self._flush_for_read()
+        start = 0 if start is None else int(start)
+        end = int(time.time()) if end is None else int(end)
+
+        with self._lock:
+            df = pd.read_sql_query(
+                "SELECT ts, source, mw FROM generation WHERE zone = ? AND ts BETWEEN ? AND ? ORDER BY ts",
+                self._conn,
+                params=(zone, start, end)
+            )
+        df["datetime"] = pd.to_datetime(df["ts"], unit="s", utc=True)
+        return df
+
+    def query_auto(self, zone, start, end, width_px=800):
+        """Rows for [start, end] at the resolution pick_resolution chooses for width_px.
+
+        Returns (resolution, DataFrame with ts, source, mw, min_mw, max_mw,
+        renewable_share and datetime columns).
+        """
+        resolution = pick_resolution(start, end, width_px)
+        if resolution == "raw":
+            df = self.query(zone, start, end)
+            df["min_mw"] = df["max_mw"] = df["mw"]
+            return resolution, add_renewable_share(df)
+
+        self._flush_for_read()
+        # Include the bucket that start falls in
+        bucket_start = start - RESOLUTIONS[resolution][0]
+        with self._lock:
+            df = query_rollup(self._conn, zone, resolution, bucket_start, end)
+        df["datetime"] = pd.to_datetime(df["ts"], unit="s", utc=True)
+        return resolution, df
+
+    def last_window(self, zone, seconds, width_px=800):
+        """query_auto for the trailing window, e.g. last_window('KE', 24 * 3600)"""
+        now = time.time()
+        return self.query_auto(zone, now - seconds, now, width_px)
+
+    def close(self):
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._closed = True
+            self._conn.close()
+            atexit.unregister(self.close)